@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context, g, has_request_context, abort, make_response
 from datetime import datetime, timedelta # Add timedelta
 from base64 import b64encode
 from flask_cors import CORS
@@ -6,20 +6,24 @@ import os # ADDED
 import sys # ADDED
 import logging # ADDED
 import requests # ADDED: Importing requests module
+import requests.adapters
 import time # ADDED: Importing time module for debugging
 import sqlite3
-from threading import Lock
-from functools import lru_cache
+from threading import Lock, Thread, Event
+from functools import lru_cache, wraps
+from collections import namedtuple, Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import heapq
+import contextvars
+import numpy as np
 
 # Import logging
 # stdout logging için
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode # Add urllib.parse
 
-# Azure DevOps SDK imports
-from msrest.authentication import BasicAuthentication
-from azure.devops.connection import Connection
-# Note: Specific clients like CoreClient, GitClient are obtained via connection.clients.get_..._client()
-# and do not need to be imported directly if using that pattern.
+# Azure DevOps SDK (azure.devops, msrest) is imported lazily in get_devops_info; loading it
+# at import time noticeably slows down container cold starts.
 
 app = Flask(__name__)
 CORS(app)
@@ -35,48 +39,386 @@ app.logger.addHandler(stream_handler)
 
 AZURE_DEVOPS_ORG_URL = os.getenv('AZURE_DEVOPS_ORG_URL')
 AZURE_DEVOPS_PAT = os.getenv('AZURE_DEVOPS_PAT')
-
-DB_PATH = 'devops_cache.db'
+# Shared secret for Azure DevOps service hooks (basic auth password or X-Hook-Secret header)
+AZURE_DEVOPS_HOOK_SECRET = os.getenv('AZURE_DEVOPS_HOOK_SECRET')
+# Shared secret for the /api/admin/* cache administration routes (disabled when unset)
+CACHE_ADMIN_SECRET = os.getenv('CACHE_ADMIN_SECRET')
+# Caches kept up to date by service hooks can live much longer when hooks are configured
+HOOK_TTL_FACTOR = int(os.getenv('HOOK_TTL_FACTOR', '12')) if AZURE_DEVOPS_HOOK_SECRET else 1
+
+# SQLite cache and the warm-restart snapshot live here (a volume in Docker, see docker-compose.yml)
+DATA_DIR = os.getenv('DATA_DIR', '.')
+DB_PATH = os.path.join(DATA_DIR, 'devops_cache.db')
 db_lock = Lock()
+db_init_lock = Lock()
+db_initialized = False
+# Hot in-memory cache is written here on shutdown and reloaded on the next start
+CACHE_SNAPSHOT_PATH = os.getenv('CACHE_SNAPSHOT_PATH', os.path.join(DATA_DIR, 'metrics_cache_snapshot.json'))
+warmup_done = Event()
+warmup_status = {"started_at": None, "finished_at": None, "restored_entries": 0, "error": None}
 
 # In-memory cache for project metrics
 metrics_cache = {}
-metrics_cache_expiry = 300  # seconds (5 minutes)
+# Read hits per (org-scoped) cache key since start, for /api/admin/cache
+cache_hits = {'memory': Counter(), 'sqlite': Counter()}
+metrics_cache_expiry = 300 * HOOK_TTL_FACTOR  # seconds (5 minutes without service hooks)
 
 def init_db():
-    with db_lock, sqlite3.connect(DB_PATH) as conn:
+    global db_initialized
+    with db_init_lock:
+        if db_initialized:
+            return
+        _create_tables()
+        db_initialized = True
+
+def connect_db():
+    """Opens the cache database, creating the tables on first use."""
+    if not db_initialized:
+        init_db()
+    return sqlite3.connect(DB_PATH)
+
+def _create_tables():
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
         c.execute('''CREATE TABLE IF NOT EXISTS projects_cache (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             cache_key TEXT UNIQUE,
             data TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expired INTEGER NOT NULL DEFAULT 0
+        )''')
+        if 'expired' not in [col[1] for col in c.execute('PRAGMA table_info(projects_cache)')]:
+            c.execute('ALTER TABLE projects_cache ADD COLUMN expired INTEGER NOT NULL DEFAULT 0')
+        # Per-project, per-day event counters (day = days since 1970-01-01 UTC)
+        c.execute('''CREATE TABLE IF NOT EXISTS daily_rollups (
+            project TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            builds INTEGER NOT NULL DEFAULT 0,
+            successful_builds INTEGER NOT NULL DEFAULT 0,
+            build_duration_sum_ms INTEGER NOT NULL DEFAULT 0,
+            build_duration_count INTEGER NOT NULL DEFAULT 0,
+            deployments INTEGER NOT NULL DEFAULT 0,
+            successful_deployments INTEGER NOT NULL DEFAULT 0,
+            deployments_test INTEGER NOT NULL DEFAULT 0,
+            deployments_staging INTEGER NOT NULL DEFAULT 0,
+            deployments_production INTEGER NOT NULL DEFAULT 0,
+            deployments_other INTEGER NOT NULL DEFAULT 0,
+            commits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (project, day)
+        )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS daily_commit_authors (
+            project TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            author TEXT NOT NULL,
+            commits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (project, day, author)
+        )''')
+        # Processed service-hook notifications, so replayed deliveries are not counted twice
+        c.execute('''CREATE TABLE IF NOT EXISTS hook_deliveries (
+            event_id TEXT PRIMARY KEY,
+            event_type TEXT,
+            project TEXT,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''')
+        # Which day range of daily_rollups is populated per project and when it was last refreshed
+        c.execute('''CREATE TABLE IF NOT EXISTS rollup_coverage (
+            project TEXT PRIMARY KEY,
+            first_day INTEGER NOT NULL,
+            last_day INTEGER NOT NULL,
+            synced_at REAL NOT NULL
+        )''')
+        # Canonical commit authors (see resolve_author_key) and the names/emails that map to them
+        c.execute('''CREATE TABLE IF NOT EXISTS author_identities (
+            author_key TEXT PRIMARY KEY,
+            display_name TEXT NOT NULL,
+            email TEXT
+        )''')
+        c.execute('''CREATE TABLE IF NOT EXISTS author_aliases (
+            alias TEXT PRIMARY KEY,
+            author_key TEXT NOT NULL
+        )''')
+        _migrate_commit_author_names(c)
+        # DORA engine: per-day running aggregates (project '*' holds the org-wide totals)
+        c.execute('''CREATE TABLE IF NOT EXISTS dora_daily (
+            project TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            deployments INTEGER NOT NULL DEFAULT 0,
+            successful_deployments INTEGER NOT NULL DEFAULT 0,
+            failed_deployments INTEGER NOT NULL DEFAULT 0,
+            lead_time_sum_ms INTEGER NOT NULL DEFAULT 0,
+            lead_time_count INTEGER NOT NULL DEFAULT 0,
+            restore_sum_ms INTEGER NOT NULL DEFAULT 0,
+            restore_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (project, day)
+        )''')
+        # Commits already fed to the DORA engine (day = author day, for pruning)
+        c.execute('''CREATE TABLE IF NOT EXISTS dora_commits (
+            project TEXT NOT NULL,
+            commit_id TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            PRIMARY KEY (project, commit_id)
+        )''')
+        # Production deployments already fed to the DORA engine (day = completion day, for pruning)
+        c.execute('''CREATE TABLE IF NOT EXISTS dora_deployments (
+            project TEXT NOT NULL,
+            deployment_id TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            PRIMARY KEY (project, deployment_id)
+        )''')
+        # DORA engine stream state per project: watermark_ms is the latest production deployment
+        # applied, commits not yet deployed are kept as (count, sum of timestamps)
+        c.execute('''CREATE TABLE IF NOT EXISTS dora_state (
+            project TEXT PRIMARY KEY,
+            watermark_ms INTEGER NOT NULL,
+            pending_commits INTEGER NOT NULL DEFAULT 0,
+            pending_commit_ms_sum INTEGER NOT NULL DEFAULT 0,
+            open_failure_ms INTEGER,
+            first_day INTEGER NOT NULL
         )''')
         conn.commit()
 
-init_db()
-
-def get_cache(cache_key):
-    with db_lock, sqlite3.connect(DB_PATH) as conn:
+def _migrate_commit_author_names(c):
+    """Re-keys daily_commit_authors rows written with raw display names to 'name:' author keys."""
+    c.execute('''SELECT DISTINCT author FROM daily_commit_authors
+                 WHERE substr(author, 1, 6) != 'email:' AND substr(author, 1, 5) != 'name:' ''')
+    legacy_names = [row[0] for row in c.fetchall()]
+    for name in legacy_names:
+        key = f"name:{normalize_author_name(name)}"
+        c.execute('INSERT OR IGNORE INTO author_aliases (alias, author_key) VALUES (?, ?)', (key, key))
+        c.execute('INSERT OR IGNORE INTO author_identities (author_key, display_name) VALUES (?, ?)', (key, name))
+        c.execute('''INSERT INTO daily_commit_authors (project, day, author, commits)
+                     SELECT project, day, ?, commits FROM daily_commit_authors WHERE author=?
+                     ON CONFLICT(project, day, author) DO UPDATE SET commits=commits+excluded.commits''', (key, name))
+        c.execute('DELETE FROM daily_commit_authors WHERE author=?', (name,))
+
+# updated_at reported for entries flagged by expire_cache_prefix, so every freshness check refetches
+EXPIRED_UPDATED_AT = '1970-01-01 00:00:00'
+
+def get_cache(cache_key, real_updated_at=False):
+    """
+    (data, updated_at) of a cache entry, or (None, None). Expired entries report
+    EXPIRED_UPDATED_AT unless real_updated_at=True (used for stale fallbacks).
+    """
+    cache_key = org_scoped(cache_key)
+    with db_lock, connect_db() as conn:
         c = conn.cursor()
-        c.execute('SELECT data, updated_at FROM projects_cache WHERE cache_key=?', (cache_key,))
+        c.execute('SELECT data, CASE WHEN expired AND NOT ? THEN ? ELSE updated_at END FROM projects_cache WHERE cache_key=?',
+                  (real_updated_at, EXPIRED_UPDATED_AT, cache_key))
         row = c.fetchone()
         if row:
+            cache_hits['sqlite'][cache_key] += 1
             return row[0], row[1]
         return None, None
 
+def get_cache_updated_at(cache_key, real_updated_at=False):
+    """updated_at of a cache entry without loading its data (see get_cache), or None."""
+    cache_key = org_scoped(cache_key)
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('SELECT CASE WHEN expired AND NOT ? THEN ? ELSE updated_at END FROM projects_cache WHERE cache_key=?',
+                  (real_updated_at, EXPIRED_UPDATED_AT, cache_key))
+        row = c.fetchone()
+        return row[0] if row else None
+
 def set_cache(cache_key, data):
-    with db_lock, sqlite3.connect(DB_PATH) as conn:
+    cache_key = org_scoped(cache_key)
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO projects_cache (cache_key, data, updated_at, expired) VALUES (?, ?, CURRENT_TIMESTAMP, 0)
+                     ON CONFLICT(cache_key) DO UPDATE SET data=excluded.data, updated_at=CURRENT_TIMESTAMP, expired=0''', (cache_key, data))
+        conn.commit()
+
+def get_memory_cache(cache_key, max_age_sec):
+    """In-memory cache entry ({'data', 'time'}) if younger than max_age_sec, else None."""
+    cache_key = org_scoped(cache_key)
+    entry = metrics_cache.get(cache_key)
+    if entry is not None and time.time() - entry['time'] < max_age_sec:
+        cache_hits['memory'][cache_key] += 1
+        return entry
+    return None
+
+def set_memory_cache(cache_key, data, ttl=None):
+    entry = {'data': data, 'time': time.time()}
+    if ttl is not None:
+        entry['ttl'] = ttl  # load_cache_snapshot honours it instead of metrics_cache_expiry
+    metrics_cache[org_scoped(cache_key)] = entry
+
+def stale_response(cache_key, error):
+    """
+    Last good value of cache_key regardless of its TTL, marked as stale (X-Data-Stale header,
+    plus stale/stale_age_sec/error keys on object bodies). Returns None if nothing was cached.
+    """
+    import json
+    from dateutil import parser as dtparser
+    cache_data, cache_time = get_cache(cache_key, real_updated_at=True)
+    if not cache_data:
+        return None
+    age = (datetime.utcnow() - dtparser.parse(cache_time)).total_seconds()
+    app.logger.warning(f"[STALE] Serving {cache_key} ({int(age)}s old) after upstream error: {upstream_error_message(error)}")
+    data = json.loads(cache_data)
+    if isinstance(data, dict):
+        data.update({"stale": True, "stale_age_sec": int(age), "error": upstream_error_message(error)})
+    response = jsonify(data)
+    response.headers['X-Data-Stale'] = 'true'
+    response.headers['X-Data-Age'] = str(int(age))
+    return response
+
+def upstream_error_message(error):
+    return str(error) or type(error).__name__
+
+def partial_response(data, errors):
+    """jsonify data; when some parts failed, mark it partial and attach per-project errors."""
+    if errors and isinstance(data, dict):
+        data = {**data, "partial": True, "errors": errors}
+    response = jsonify(data)
+    if errors:
+        response.headers['X-Data-Partial'] = 'true'
+    return response
+
+def delete_cache(cache_key):
+    cache_key = org_scoped(cache_key)
+    metrics_cache.pop(cache_key, None)
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM projects_cache WHERE cache_key=?', (cache_key,))
+        conn.commit()
+        return c.rowcount
+
+def expire_cache_prefix(prefix, exact=False):
+    """
+    Makes matching entries look expired (drops the in-memory copy, flags the SQLite row)
+    so the next read refetches while the old value, with its real age, stays as stale fallback.
+    exact=True only matches the key itself.
+    """
+    prefix = org_scoped(prefix)
+    for key in [k for k in list(metrics_cache) if k == prefix or (not exact and k.startswith(prefix))]:
+        metrics_cache.pop(key, None)
+    with db_lock, connect_db() as conn:
         c = conn.cursor()
-        c.execute('''INSERT INTO projects_cache (cache_key, data, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
-                     ON CONFLICT(cache_key) DO UPDATE SET data=excluded.data, updated_at=CURRENT_TIMESTAMP''', (cache_key, data))
+        if exact:
+            c.execute("UPDATE projects_cache SET expired=1 WHERE cache_key = ?", (prefix,))
+        else:
+            c.execute("UPDATE projects_cache SET expired=1 WHERE substr(cache_key, 1, ?) = ?", (len(prefix), prefix))
         conn.commit()
+        return c.rowcount
+
+def delete_cache_prefix(prefix):
+    """Drops every in-memory and SQLite cache entry whose key starts with prefix."""
+    prefix = org_scoped(prefix)
+    for key in [k for k in list(metrics_cache) if k.startswith(prefix)]:
+        metrics_cache.pop(key, None)
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        # substr() instead of LIKE: exact, case-sensitive and no wildcard escaping needed
+        c.execute('DELETE FROM projects_cache WHERE substr(cache_key, 1, ?) = ?', (len(prefix), prefix))
+        conn.commit()
+        return c.rowcount
+
+def save_cache_snapshot():
+    """Writes the in-memory cache to CACHE_SNAPSHOT_PATH (atomically) so a restart starts warm."""
+    import json
+    entries = dict(metrics_cache)
+    if not entries:
+        return
+    tmp_path = f"{CACHE_SNAPSHOT_PATH}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump({"saved_at": time.time(), "entries": entries}, f)
+        os.replace(tmp_path, CACHE_SNAPSHOT_PATH)
+        app.logger.info(f"[SNAPSHOT] Saved {len(entries)} cache entries to {CACHE_SNAPSHOT_PATH}")
+    except (OSError, TypeError, ValueError) as e:
+        app.logger.error(f"[SNAPSHOT] Could not save cache snapshot: {e}")
+
+def load_cache_snapshot():
+    """Restores snapshot entries still within their TTL (default metrics_cache_expiry). Returns the count."""
+    import json
+    try:
+        with open(CACHE_SNAPSHOT_PATH) as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        app.logger.error(f"[SNAPSHOT] Ignoring unreadable cache snapshot: {e}")
+        return 0
+    now = time.time()
+    restored = 0
+    for key, entry in snapshot.get('entries', {}).items():
+        if now - entry.get('time', 0) < entry.get('ttl', metrics_cache_expiry) and key not in metrics_cache:
+            metrics_cache[key] = entry
+            restored += 1
+    return restored
+
+def warm_up():
+    warmup_status["started_at"] = time.time()
+    try:
+        init_db()
+        warmup_status["restored_entries"] = load_cache_snapshot()
+        app.logger.info(f"[WARMUP] Done, restored {warmup_status['restored_entries']} cache entries from snapshot.")
+    except Exception as e:
+        warmup_status["error"] = str(e)
+        app.logger.error(f"[WARMUP] Warm-up failed: {e}", exc_info=True)
+    finally:
+        warmup_status["finished_at"] = time.time()
+        warmup_done.set()
+
+background_started = False
+background_start_lock = Lock()
+
+def install_sigterm_snapshot():
+    """
+    Saves the cache snapshot on SIGTERM, then hands the signal to whatever handler was
+    installed before (e.g. a WSGI server's graceful shutdown). Main thread only.
+    """
+    import signal
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        if callable(previous):
+            save_cache_snapshot()
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            sys.exit(0)  # default action: exit normally so the atexit snapshot runs
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+def start_background_services(handle_sigterm=False):
+    """
+    Registers the shutdown snapshot and starts the cache warm-up, once per process. Runs from
+    the __main__ entry point or on the first request, never at import, so importing the app
+    (tests, WSGI servers) leaves the process' signal handlers alone.
+    """
+    global background_started
+    with background_start_lock:
+        if background_started:
+            return
+        background_started = True
+    import atexit
+    atexit.register(save_cache_snapshot)
+    if handle_sigterm:
+        install_sigterm_snapshot()
+    Thread(target=warm_up, name='cache-warmup', daemon=True).start()
+
+@app.before_request
+def ensure_background_services():
+    if not background_started:
+        start_background_services()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     app.logger.info("Health check endpoint called.")
     return jsonify({"status": "healthy", "message": "API is running."}), 200
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness (unlike /api/health): 200 only once the warm-up has finished."""
+    if not warmup_done.is_set():
+        return jsonify({"status": "warming_up", "started_at": warmup_status["started_at"]}), 503
+    circuits = {}
+    for (org_name, host), breaker in list(circuit_breakers.items()):
+        circuits.setdefault(org_name, {})[host] = breaker.state
+    return jsonify({"status": "ready", **warmup_status, "circuits": circuits}), 200
+
 @app.route('/api/env-check', methods=['GET'])
 def env_check():
     app.logger.info("Environment check endpoint called.")
@@ -96,20 +438,337 @@ def env_check():
 #         'Content-Type': 'application/json'
 #     }
 
+# Organizations
+# One deployment can serve several Azure DevOps organizations. The legacy
+# AZURE_DEVOPS_ORG_URL / AZURE_DEVOPS_PAT pair is the default organization; more are listed
+# in AZURE_DEVOPS_ORGS (comma-separated names) with AZURE_DEVOPS_PAT_<NAME> (falls back to
+# AZURE_DEVOPS_PAT) and optionally AZURE_DEVOPS_ORG_URL_<NAME>. Every /api/... route is also
+# served as /api/orgs/<org>/...; the org of the current request lives in a ContextVar so it
+# follows work handed to upstream_executor (see submit_upstream).
+OrgConfig = namedtuple('OrgConfig', ['name', 'url', 'pat', 'rate_per_sec', 'rate_burst'])
+
+current_org = contextvars.ContextVar('current_org', default=None)
+
+def org_env_name(name, org_name):
+    import re
+    return f"{name}_{re.sub(r'[^A-Za-z0-9]', '_', org_name).upper()}"
+
+def org_env(name, org_name, default=None):
+    """Per-org override NAME_<ORG> of an environment setting, else NAME, else default."""
+    return os.environ.get(org_env_name(name, org_name)) or os.environ.get(name) or default
+
+def make_org_config(name, url):
+    return OrgConfig(
+        name=name,
+        url=url.rstrip('/'),
+        pat=org_env('AZURE_DEVOPS_PAT', name),
+        rate_per_sec=float(org_env('AZURE_DEVOPS_RATE_PER_SEC', name, '20')),
+        rate_burst=int(org_env('AZURE_DEVOPS_RATE_BURST', name, '40')),
+    )
+
+@lru_cache(maxsize=1)
+def get_org_configs():
+    """{org name: OrgConfig}, default organization first."""
+    configs = {}
+    default_url = os.environ.get('AZURE_DEVOPS_ORG_URL')
+    if default_url:
+        name = default_url.rstrip('/').split('/')[-1]
+        configs[name] = make_org_config(name, default_url)
+    for name in (os.environ.get('AZURE_DEVOPS_ORGS') or '').split(','):
+        name = name.strip()
+        if name and name not in configs:
+            url = os.environ.get(org_env_name('AZURE_DEVOPS_ORG_URL', name)) or f'https://dev.azure.com/{name}'
+            configs[name] = make_org_config(name, url)
+    return configs
+
+def get_default_org_name():
+    return next(iter(get_org_configs()), None)
+
+def get_org_config():
+    """OrgConfig of the current request's organization (the default one outside org routes)."""
+    name = current_org.get() or get_default_org_name()
+    config = get_org_configs().get(name)
+    if config is None:
+        app.logger.error("AZURE_DEVOPS_ORG_URL environment variable not set.")
+        raise ValueError("Azure DevOps Org URL not configured in environment.")
+    return config
+
+def org_scoped(key):
+    """Namespaces a cache/store key by organization; default-org keys stay unprefixed."""
+    name = current_org.get()
+    if not name or name == get_default_org_name():
+        return key
+    return f"{name}/{key}"
+
+def org_unscoped(keys):
+    """Keys of the current organization among org_scoped keys, with the namespace removed."""
+    name = current_org.get()
+    if not name or name == get_default_org_name():
+        return [key for key in keys if '/' not in key]
+    prefix = f"{name}/"
+    return [key[len(prefix):] for key in keys if key.startswith(prefix)]
+
+def submit_upstream(fn, *args):
+    """upstream_executor.submit that keeps the caller's organization."""
+    return upstream_executor.submit(contextvars.copy_context().run, fn, *args)
+
 def get_devops_pat():
-    pat = os.environ.get('AZURE_DEVOPS_PAT')
+    pat = get_org_config().pat
     if not pat:
         app.logger.error("AZURE_DEVOPS_PAT environment variable not set.") # ADDED logger
         raise ValueError("Azure DevOps PAT not configured in environment.")
     return pat
 
 def get_devops_org_url():
-    org_url = os.environ.get('AZURE_DEVOPS_ORG_URL')
-    if not org_url:
-        app.logger.error("AZURE_DEVOPS_ORG_URL environment variable not set.")
-        raise ValueError("Azure DevOps Org URL not configured in environment.")
     # Ensure it doesn't end with a slash for consistent joining
-    return org_url.rstrip('/')
+    return get_org_config().url
+
+def get_devops_org_name():
+    return get_org_config().name
+
+def get_devops_release_url():
+    """Release Management (vsrm) base URL of the current organization, derived from its org URL."""
+    parsed = urlparse(get_devops_org_url())
+    host = parsed.netloc
+    if host == 'dev.azure.com':
+        host = 'vsrm.dev.azure.com'
+    elif host.endswith('.visualstudio.com'):
+        host = host[:-len('.visualstudio.com')] + '.vsrm.visualstudio.com'
+    # Azure DevOps Server serves release APIs from the collection URL itself
+    return urlunparse(parsed._replace(netloc=host))
+
+@app.url_value_preprocessor
+def pull_org(endpoint, values):
+    org_name = values.pop('org', None) if values else None
+    if org_name is not None and org_name not in get_org_configs():
+        abort(make_response(jsonify({"error": f"Unknown organization '{org_name}'"}), 404))
+    # Set on every request: worker threads are reused, so a previous org must not leak
+    current_org.set(org_name)
+
+@app.route('/api/orgs', methods=['GET'])
+def list_orgs():
+    default_name = get_default_org_name()
+    return jsonify([{"name": config.name, "url": config.url, "default": config.name == default_name,
+                     "pat_set": bool(config.pat), "rate_per_sec": config.rate_per_sec}
+                    for config in get_org_configs().values()])
+
+# Upstream calls
+# Every Azure DevOps request goes through azure_get: it never waits longer than the
+# remaining latency budget of the current route (g.deadline, set by @with_budget), it
+# skips hosts whose circuit breaker (per organization) is open after repeated failures, and it uses the
+# organization's pooled session and rate budget.
+UPSTREAM_TIMEOUT_SEC = float(os.getenv('UPSTREAM_TIMEOUT_SEC', '30'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SEC = float(os.getenv('CIRCUIT_RESET_SEC', '30'))
+UPSTREAM_WORKERS = int(os.getenv('UPSTREAM_WORKERS', '8'))
+UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', '16'))  # keep-alive connections per organization
+
+# Shared pool for fanning out independent Azure DevOps calls (e.g. one per repo). Workers have
+# no request context, so callers pass the route deadline to azure_get explicitly and submit
+# through submit_upstream, which carries the organization over.
+upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix='azure-upstream')
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The route's latency budget ran out before an upstream call could be made."""
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The upstream host is failing; the call was skipped without hitting the network."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. Opens after CIRCUIT_FAILURE_THRESHOLD failures,
+    lets a single trial request through after CIRCUIT_RESET_SEC and closes on its success.
+    """
+
+    def __init__(self, failure_threshold, reset_sec):
+        self.failure_threshold = failure_threshold
+        self.reset_sec = reset_sec
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_sec and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def release(self):
+        """Gives back a trial granted by allow() that ended without calling the host."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    @property
+    def state(self):
+        return 'closed' if self.opened_at is None else 'open'
+
+circuit_breakers = {}
+circuit_breakers_lock = Lock()
+
+def get_circuit_breaker(org_name, host):
+    """Breaker per (organization, host): every org shares dev.azure.com, but not its failures."""
+    with circuit_breakers_lock:
+        breaker = circuit_breakers.get((org_name, host))
+        if breaker is None:
+            breaker = circuit_breakers[(org_name, host)] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SEC)
+        return breaker
+
+class RateBudget:
+    """
+    Token bucket of one organization: rate_per_sec requests on average, bursts up to burst.
+    A 429/503 Retry-After from Azure DevOps pauses the whole bucket.
+    """
+
+    def __init__(self, rate_per_sec, burst):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = Lock()
+
+    def reserve(self):
+        """Takes a token and returns how many seconds the caller must wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_per_sec)
+            self.updated = now
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate_per_sec
+            return max(wait, self.paused_until - now)
+
+    def cancel(self):
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class RateBudgetExceeded(DeadlineExceeded):
+    """The organization's request rate budget would only allow the call after the route deadline."""
+
+org_sessions = {}
+org_rate_budgets = {}
+org_pools_lock = Lock()
+
+def get_org_session(config):
+    """Pooled keep-alive requests.Session per organization."""
+    with org_pools_lock:
+        session = org_sessions.get(config.name)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=UPSTREAM_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            org_sessions[config.name] = session
+        return session
+
+def get_org_rate_budget(config):
+    with org_pools_lock:
+        budget = org_rate_budgets.get(config.name)
+        if budget is None:
+            budget = org_rate_budgets[config.name] = RateBudget(config.rate_per_sec, config.rate_burst)
+        return budget
+
+def retry_after_seconds(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+ROUTE_BUDGET_SCALE = float(os.getenv('ROUTE_BUDGET_SCALE', '1'))  # stretch/shrink every route budget
+
+def with_budget(seconds):
+    """Gives a route a latency budget; upstream calls made while handling it share the deadline."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.deadline = time.monotonic() + seconds * ROUTE_BUDGET_SCALE
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def remaining_budget(deadline=None):
+    if deadline is None and has_request_context():
+        deadline = g.get('deadline')
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def azure_get(url, headers=None, params=None, deadline=None):
+    """
+    GET through the current organization's pooled session, after its rate budget allows it,
+    with a budget-derived timeout and a circuit breaker per organization and host.
+    """
+    config = get_org_config()
+    timeout = UPSTREAM_TIMEOUT_SEC
+    remaining = remaining_budget(deadline)
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Latency budget exhausted before requesting {urlparse(url).path}")
+        timeout = min(timeout, remaining)
+    host = urlparse(url).netloc
+    # Take the rate token before asking the breaker, so a call rejected by the rate budget
+    # never holds the breaker's single half-open trial
+    rate_budget = get_org_rate_budget(config)
+    wait = rate_budget.reserve()
+    if wait > 0 and remaining is not None and wait >= remaining:
+        rate_budget.cancel()
+        raise RateBudgetExceeded(f"Rate budget of organization {config.name} allows the next call in {wait:.1f}s, after the deadline")
+    breaker = get_circuit_breaker(config.name, host)
+    if not breaker.allow():
+        rate_budget.cancel()
+        raise CircuitOpenError(f"Circuit breaker open for {host}; not calling Azure DevOps.")
+    called = False
+    try:
+        if wait > 0:
+            time.sleep(wait)
+            if remaining is not None:
+                timeout = min(UPSTREAM_TIMEOUT_SEC, remaining - wait)
+                if timeout <= 0:
+                    raise DeadlineExceeded(f"Latency budget exhausted while waiting to request {urlparse(url).path}")
+        called = True
+        response = get_org_session(config).get(url, headers=headers, params=params, timeout=timeout)
+    except requests.exceptions.Timeout:
+        if timeout < UPSTREAM_TIMEOUT_SEC:
+            # Our own route deadline ran out, not Azure DevOps: don't count it against the host
+            breaker.release()
+        else:
+            breaker.record_failure()
+        raise
+    except requests.exceptions.RequestException:
+        breaker.record_failure()
+        raise
+    finally:
+        if not called:
+            breaker.release()
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure()
+        retry_after = retry_after_seconds(response)
+        if retry_after:
+            app.logger.warning(f"[RATE] {config.name}: Azure DevOps asked to retry after {retry_after}s")
+            rate_budget.pause(retry_after)
+    else:
+        breaker.record_success()
+    return response
 
 def get_headers():
     pat = get_devops_pat()
@@ -134,7 +793,7 @@ def get_projects_data():
     api_version = '7.1-preview.1' # Corrected: Removed backslashes
     # The org_url from env is expected to be like https://dev.azure.com/OrgName
     url = f'{org_url}/_apis/projects?api-version={api_version}' # Corrected: Removed backslashes
-    response = requests.get(url, headers=get_headers())
+    response = azure_get(url, headers=get_headers())
     response.raise_for_status()
     return response.json().get('value', [])
 
@@ -151,7 +810,7 @@ def get_pipelines_data(project_name):
     app.logger.info(f"[get_pipelines_data] Fetching pipelines for project: {project_name} in org: {org_url}")
     api_version = '7.1-preview.1' # Corrected: Removed backslashes
     url = f'{org_url}/{project_name}/_apis/pipelines?api-version={api_version}' # Corrected: Removed backslashes
-    response = requests.get(url, headers=get_headers())
+    response = azure_get(url, headers=get_headers())
     response.raise_for_status()
     return response.json().get('value', [])
 
@@ -168,10 +827,24 @@ def get_repos_data(project_name): # Assuming this might be needed later
     app.logger.info(f"[get_repos_data] Fetching repos for project: {project_name} in org: {org_url}")
     api_version = '7.1-preview.1' # Corrected: Removed backslashes
     url = f'{org_url}/{project_name}/_apis/git/repositories?api-version={api_version}' # Corrected: Removed backslashes
-    response = requests.get(url, headers=get_headers())
+    response = azure_get(url, headers=get_headers())
     response.raise_for_status()
     return response.json().get('value', [])
 
+REPOS_CACHE_SEC = 600 * HOOK_TTL_FACTOR  # 10 dakika (service hook'lar açıkken daha uzun)
+
+def get_repos_cached(project_name):
+    """Repos of a project through the same SQLite entry as /repos, fetched only when expired."""
+    import json
+    from dateutil import parser as dtparser
+    cache_key = f"repos-{project_name}"
+    cache_data, cache_time = get_cache(cache_key)
+    if cache_data and (datetime.utcnow() - dtparser.parse(cache_time)).total_seconds() < REPOS_CACHE_SEC:
+        return json.loads(cache_data)
+    repos = get_repos_data(project_name)
+    set_cache(cache_key, json.dumps(repos))
+    return repos
+
 # Helper function to fetch release definitions for a project
 # def get_releases_data(organization, pat, project_name):
 #     api_version = '7.0' # Corrected: Removed backslashes
@@ -181,28 +854,25 @@ def get_repos_data(project_name): # Assuming this might be needed later
 #     return response.json().get('value', [])
 
 def get_releases_data(project_name):
-    org_url = get_devops_org_url()
-    # Extract organization name for vsrm URL
-    # org_url is like https://dev.azure.com/OrgName. We need OrgName.
-    organization_name = org_url.split('/')[-1]
+    organization_name = get_devops_org_name()
     app.logger.info(f"[get_releases_data] Fetching release definitions for project: {project_name} in org: {organization_name}")
     api_version = '7.0' 
-    url = f'https://vsrm.dev.azure.com/{organization_name}/{project_name}/_apis/release/definitions?api-version={api_version}' # Corrected: Removed backslashes
-    response = requests.get(url, headers=get_headers())
+    url = f'{get_devops_release_url()}/{project_name}/_apis/release/definitions?api-version={api_version}' # Corrected: Removed backslashes
+    response = azure_get(url, headers=get_headers())
     response.raise_for_status()
     return response.json().get('value', [])
 
 # Helper function to fetch commits for a repository within a date range
-def get_commits_data(organization, project_name, repository_id, start_date, end_date, repository_name=None):
+def get_commits_data(organization, project_name, repository_id, start_date, end_date, repository_name=None, top=50, deadline=None):
     api_version = '7.1-preview.1'
-    url = f'https://dev.azure.com/{organization}/{project_name}/_apis/git/repositories/{repository_id}/commits'
+    url = f'{get_devops_org_url()}/{project_name}/_apis/git/repositories/{repository_id}/commits'
     params = {
         'searchCriteria.fromDate': start_date,
         'searchCriteria.toDate': end_date,
         'api-version': api_version,
-        '$top': 50 # Fetch more to ensure we have enough after filtering, if needed
+        'searchCriteria.$top': top  # Commits come back newest first, so $top is enough for "latest N"
     }
-    response = requests.get(url, headers=get_headers(), params=params)
+    response = azure_get(url, headers=get_headers(), params=params, deadline=deadline)
     response.raise_for_status()
     commits = response.json().get('value', [])
     if repository_name:
@@ -210,22 +880,236 @@ def get_commits_data(organization, project_name, repository_id, start_date, end_
             commit['repositoryName'] = repository_name
     return commits
 
+# Helper function to fetch every commit of a repository within a date range (paged)
+def get_all_commits_data(organization, project_name, repository_id, start_date, end_date, page_size=1000):
+    api_version = '7.1-preview.1'
+    url = f'{get_devops_org_url()}/{project_name}/_apis/git/repositories/{repository_id}/commits'
+    headers = get_headers()
+    commits = []
+    skip = 0
+    while True:
+        params = {
+            'searchCriteria.fromDate': start_date,
+            'searchCriteria.toDate': end_date,
+            'searchCriteria.$top': page_size,
+            'searchCriteria.$skip': skip,
+            'api-version': api_version,
+        }
+        response = azure_get(url, headers=headers, params=params)
+        response.raise_for_status()
+        page = response.json().get('value', [])
+        commits.extend(to_commit_record(c) for c in page)
+        if len(page) < page_size:
+            return commits
+        skip += page_size
+
+# Compact fetch records: metrics only read a handful of fields from each build/deployment,
+# so pages are converted to these compact records right away and the raw JSON dicts
+# (links, requestedBy, repository, logs, release, ...) are dropped page by page.
+DeploymentRecord = namedtuple('DeploymentRecord', ['status', 'environment', 'started_on', 'completed_on', 'id'], defaults=(None,))
+BuildRecord = namedtuple('BuildRecord', ['status', 'result', 'start_time', 'finish_time', 'queue_time', 'definition'])
+
+def get_deployment_environment_name(dep):
+    # Environment name from a raw deployment dict (releaseEnvironment is always returned
+    # as a shallow reference, older payloads carried it on release.environmentName)
+    if dep.get('releaseEnvironment', {}).get('name'):
+        return dep['releaseEnvironment']['name']
+    if dep.get('release', {}).get('environmentName'):
+        return dep['release']['environmentName']
+    return None
+
+def to_deployment_record(dep):
+    return DeploymentRecord(
+        status=(dep.get('deploymentStatus') or '').lower(),
+        environment=get_deployment_environment_name(dep),
+        started_on=dep.get('startedOn'),
+        completed_on=dep.get('completedOn'),
+        id=dep.get('id'),
+    )
+
+def to_build_record(build):
+    return BuildRecord(
+        status=(build.get('status') or '').lower(),
+        result=(build.get('result') or '').lower(),
+        start_time=build.get('startTime'),
+        finish_time=build.get('finishTime'),
+        queue_time=build.get('queueTime'),
+        definition=(build.get('definition') or {}).get('name'),
+    )
+
+CommitRecord = namedtuple('CommitRecord', ['author', 'date', 'email', 'commit_id'], defaults=(None,))
+
+def to_commit_record(commit):
+    author = commit.get('author', {})
+    return CommitRecord(author=author.get('name', 'Unknown'), date=author.get('date'), email=author.get('email'),
+                        commit_id=commit.get('commitId'))
+
+def author_label(name, email):
+    """git-style 'Name <email>' label, or just the name when there is no email."""
+    return f"{name} <{email}>" if email else name
+
+def parse_author_label(label):
+    if label.endswith('>') and ' <' in label:
+        name, email = label[:-1].rsplit(' <', 1)
+        return name, email
+    return label, None
+
+# Columnar event table
+# Builds, deployments and commits of a metrics window are packed into numpy columns:
+# timestamps as int64 epoch milliseconds, status/result/author/environment as interned
+# integer codes and durations in milliseconds. Aggregations then run as array operations
+# instead of per-dict Python loops.
+EVENT_BUILD = 0
+EVENT_DEPLOYMENT = 1
+EVENT_COMMIT = 2
+EPOCH_MISSING = np.iinfo(np.int64).min  # NaT as int64
+
+class StringPool:
+    """Interns strings to small integer codes. Code 0 is reserved for missing values."""
+
+    def __init__(self):
+        self.values = [None]
+        self.codes = {None: 0}
+
+    def code(self, value):
+        value = value or None
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        return self.codes.get(value or None, -1)
+
+def iso_to_epoch_ms(values):
+    """
+    Converts ISO-8601 timestamp strings to an int64 array of epoch milliseconds in one
+    numpy pass. Missing values become EPOCH_MISSING.
+    """
+    cleaned = [v[:-1] if v and v.endswith('Z') else (v or 'NaT') for v in values]
+    try:
+        return np.array(cleaned, dtype='datetime64[ms]').astype(np.int64)
+    except ValueError:
+        # Explicit offsets (+03:00) are not understood by numpy; normalise them one by one.
+        # 'Z' was stripped above, so values without an offset are UTC, not local time.
+        from datetime import timezone
+        from dateutil import parser as dtparser
+        epochs = np.full(len(cleaned), EPOCH_MISSING, dtype=np.int64)
+        for i, v in enumerate(cleaned):
+            if v != 'NaT':
+                try:
+                    parsed = dtparser.isoparse(v)
+                    if parsed.tzinfo is None:
+                        parsed = parsed.replace(tzinfo=timezone.utc)
+                    epochs[i] = int(parsed.timestamp() * 1000)
+                except (ValueError, OverflowError):
+                    pass
+        return epochs
+
+class EventTable:
+    """
+    Array-backed table of build, deployment and commit events.
+
+    Columns: kind (int8), start_ms / end_ms (int64 epoch ms), duration_ms (int64, -1 when
+    unknown) and status / result / author / environment / commit / deployment (int32 codes into
+    StringPools; commit and deployment hold ids).
+    """
+
+    CODE_COLUMNS = ('status', 'result', 'author', 'environment', 'commit', 'deployment')
+
+    def __init__(self):
+        self.pools = {name: StringPool() for name in self.CODE_COLUMNS}
+        self.kind = np.empty(0, dtype=np.int8)
+        self.start_ms = np.empty(0, dtype=np.int64)
+        self.end_ms = np.empty(0, dtype=np.int64)
+        self.duration_ms = np.empty(0, dtype=np.int64)
+        self.codes = {name: np.empty(0, dtype=np.int32) for name in self.CODE_COLUMNS}
+
+    @classmethod
+    def from_events(cls, builds=(), deployments=(), commits=()):
+        """Builds a table from BuildRecord, DeploymentRecord and CommitRecord sequences."""
+        table = cls()
+        table.append(EVENT_BUILD, [b.start_time for b in builds], [b.finish_time for b in builds],
+                     status=[b.status for b in builds], result=[b.result for b in builds])
+        table.append(EVENT_DEPLOYMENT, [d.started_on for d in deployments], [d.completed_on for d in deployments],
+                     status=[d.status for d in deployments], environment=[d.environment for d in deployments],
+                     deployment=[None if d.id is None else str(d.id) for d in deployments])
+        table.append(EVENT_COMMIT, [None] * len(commits), [c.date for c in commits],
+                     author=[author_label(c.author, c.email) for c in commits], commit=[c.commit_id for c in commits])
+        return table
+
+    def append(self, kind, starts, ends, **columns):
+        n = len(ends)
+        if n == 0:
+            return
+        start_ms = iso_to_epoch_ms(starts)
+        end_ms = iso_to_epoch_ms(ends)
+        duration_ms = np.where((start_ms != EPOCH_MISSING) & (end_ms != EPOCH_MISSING), end_ms - start_ms, -1)
+        self.kind = np.concatenate([self.kind, np.full(n, kind, dtype=np.int8)])
+        self.start_ms = np.concatenate([self.start_ms, start_ms])
+        self.end_ms = np.concatenate([self.end_ms, end_ms])
+        self.duration_ms = np.concatenate([self.duration_ms, duration_ms])
+        for name in self.CODE_COLUMNS:
+            values = columns.get(name)
+            pool = self.pools[name]
+            codes = np.fromiter((pool.code(v) for v in values), dtype=np.int32, count=n) if values else np.zeros(n, dtype=np.int32)
+            self.codes[name] = np.concatenate([self.codes[name], codes])
+
+    def __len__(self):
+        return len(self.kind)
+
+    def mask(self, kind):
+        return self.kind == kind
+
+    def value_counts(self, kind, column):
+        """Returns {value: count} for events of `kind`; missing values are reported under None."""
+        pool = self.pools[column]
+        counts = np.bincount(self.codes[column][self.mask(kind)], minlength=len(pool.values))
+        return {pool.values[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+def environment_bucket(env_name):
+    """Maps an environment name to Test/Staging/Production, the name itself, or 'Unknown'."""
+    if not env_name:
+        return 'Unknown'
+    env_lower = env_name.lower()
+    if 'test' in env_lower:
+        return 'Test'
+    if 'stag' in env_lower:
+        return 'Staging'
+    if 'prod' in env_lower:
+        return 'Production'
+    return env_name
+
+def bucket_environment_counts(env_counts):
+    """
+    Folds raw environment name counts into the dashboard's Test/Staging/Production buckets.
+    Unmatched names are kept as-is and deployments without an environment go to 'Unknown'.
+    """
+    from collections import defaultdict
+    buckets = defaultdict(int)
+    for env_name, count in env_counts.items():
+        buckets[environment_bucket(env_name)] += count
+    return buckets
+
 # Helper function to fetch all deployments for a project within a date range
 def get_all_deployments_for_project(organization, project_name, start_date_str, end_date_str): # REMOVED pat
+    """
+    Returns DeploymentRecords of deployments completed in the given range; each page is
+    converted as soon as it is parsed.
+    """
     api_version = '7.0'  # Use a recent, stable API version for deployments
     deployments = []
     
     headers = get_headers() # CHANGED: get_headers() called without args
     
-    # Initial URL construction
-    # Note: The 'organization' parameter here is the organization NAME, not the full URL.
-    # vsrm.dev.azure.com requires the organization name.
-    base_url_for_pagination = f"https://vsrm.dev.azure.com/{organization}/{project_name}/_apis/release/deployments"
+    # Initial URL construction (vsrm host derived from the organization's URL)
+    base_url_for_pagination = f"{get_devops_release_url()}/{project_name}/_apis/release/deployments"
     query_params = {
         'api-version': api_version,
         'minCompletedTime': start_date_str,
         'maxCompletedTime': end_date_str,
-        '$expand': 'releaseEnvironment',
         # '$top': 100 # Optionally add $top to control page size
     }
     current_url = f"{base_url_for_pagination}?{urlencode(query_params)}"
@@ -233,13 +1117,13 @@ def get_all_deployments_for_project(organization, project_name, start_date_str,
 
     while current_url:
         try:
-            response = requests.get(current_url, headers=headers)
+            response = azure_get(current_url, headers=headers)
             app.logger.debug(f"[get_all_deployments_for_project] Request to {current_url} status: {response.status_code}")
             response.raise_for_status()
             data = response.json()
             page_deployments = data.get('value', [])
-            deployments.extend(page_deployments)
-            app.logger.debug(f"[get_all_deployments_for_project] Fetched {len(page_deployments)} deployments this page. Total so far: {len(deployments)}")
+            deployments.extend(to_deployment_record(d) for d in page_deployments)
+            app.logger.debug(f"[get_all_deployments_for_project] Total deployments so far: {len(deployments)}")
             
             if 'x-ms-continuationtoken' in response.headers:
                 continuation_token = response.headers['x-ms-continuationtoken']
@@ -253,9 +1137,8 @@ def get_all_deployments_for_project(organization, project_name, start_date_str,
                 current_url = None # No more pages
         except requests.exceptions.RequestException as e:
             app.logger.error(f"Error fetching deployments for project {project_name} at {current_url}: {e}")
-            # Depending on desired behavior, could raise e or return partial/empty list
-            # For counting, it's important to get all, so an error here might mean incomplete counts.
-            break # Exit loop on error to avoid infinite loops on persistent issues
+            # Incomplete pages would silently undercount; let the caller mark its result partial/stale
+            raise
 
     app.logger.info(f"Found {len(deployments)} total deployments for project {project_name} in the time range.")
     return deployments
@@ -293,7 +1176,7 @@ def get_pipeline_runs_count_for_project(organization_name, project_name, min_tim
     page_num = 1
     while current_url:
         try:
-            response = requests.get(current_url, headers=headers)
+            response = azure_get(current_url, headers=headers)
             app.logger.debug(f"[get_pipeline_runs_count_for_project] Page {page_num} request to {current_url} status: {response.status_code}")
             response.raise_for_status()
             data = response.json()
@@ -313,11 +1196,43 @@ def get_pipeline_runs_count_for_project(organization_name, project_name, min_tim
                 current_url = None 
         except requests.exceptions.RequestException as e:
             app.logger.error(f"Error fetching pipeline runs for project {project_name} at {current_url}: {e}")
-            break # Exit loop on error
+            raise
             
     app.logger.info(f"Found {all_runs_count} pipeline runs for project {project_name} in the time range.")
     return all_runs_count
 
+# Helper function to fetch builds for a project within a date range
+def get_builds_for_project(project_name, min_time_str, max_time_str):
+    """
+    Returns BuildRecords of builds in the given range; each page is converted as soon as it
+    is parsed.
+    """
+    org_url_base = get_devops_org_url()
+    api_version = '7.0'
+    builds_url = f"{org_url_base}/{project_name}/_apis/build/builds"
+    builds_params = {
+        'api-version': api_version,
+        'minTime': min_time_str,
+        'maxTime': max_time_str,
+        'queryOrder': 'finishTimeDescending',
+        '$top': 1000  # reasonable upper limit for 7 days
+    }
+    headers = get_headers()
+    builds = []
+    next_url = f"{builds_url}?{urlencode(builds_params)}"
+    while next_url:
+        resp = azure_get(next_url, headers=headers)
+        resp.raise_for_status()
+        page_builds = resp.json().get('value', [])
+        builds.extend(to_build_record(b) for b in page_builds)
+        if 'x-ms-continuationtoken' in resp.headers:
+            builds_params['continuationToken'] = resp.headers['x-ms-continuationtoken']
+            next_url = f"{builds_url}?{urlencode(builds_params)}"
+        else:
+            next_url = None
+    app.logger.info(f"[get_builds_for_project] Found {len(builds)} builds for project {project_name} in the time range.")
+    return builds
+
 # Helper function to get commits count for a project
 def get_commits_count_for_project(organization_name, project_name, start_date_str, end_date_str): # REMOVED pat
     # This function calls get_commits_data which expects 'organization_name'.
@@ -339,9 +1254,647 @@ def get_commits_count_for_project(organization_name, project_name, start_date_st
         return total_commits
     except Exception as e:
         app.logger.error(f"Error fetching commits for project {project_name}: {e}", exc_info=True)
-        return 0
+        # Re-raise instead of reporting 0 commits; callers decide between partial and stale results
+        raise
+
+# Author identities
+# Commit counters are keyed by a canonical author key instead of the raw display name, so
+# the same person committing under several names/emails is counted once:
+# - an optional mailmap (AUTHOR_ALIASES_PATH, JSON {"alias name or email": "canonical name or email"})
+#   is applied first,
+# - commits are then matched by email ('email:<address>'),
+# - and name-only identities (no email seen yet) are adopted by the first email that uses
+#   the same name ('name:<name>').
+# Resolutions are persisted in author_aliases and cached in memory.
+AUTHOR_ALIASES_PATH = os.getenv('AUTHOR_ALIASES_PATH')
+
+author_alias_cache = {}  # alias -> author key
+author_email_keys = set()  # author keys that already have an email
+author_alias_lock = Lock()
+author_alias_loaded = False
+
+def normalize_author_name(name):
+    return ' '.join((name or '').split()).casefold()
+
+def normalize_author_email(email):
+    return (email or '').strip().lower()
+
+def author_alias(name=None, email=None):
+    if email:
+        return f"email:{normalize_author_email(email)}"
+    return f"name:{normalize_author_name(name)}"
+
+@lru_cache(maxsize=1)
+def get_author_mailmap():
+    """{alias: canonical alias} from AUTHOR_ALIASES_PATH (values containing '@' are emails)."""
+    import json
+    if not AUTHOR_ALIASES_PATH:
+        return {}
+    try:
+        with open(AUTHOR_ALIASES_PATH) as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        app.logger.error(f"[AUTHORS] Ignoring unreadable author aliases file {AUTHOR_ALIASES_PATH}: {e}")
+        return {}
+
+    def to_alias(value):
+        return author_alias(email=value) if '@' in value else author_alias(name=value)
+
+    return {to_alias(alias): to_alias(canonical) for alias, canonical in raw.items()}
+
+def load_author_aliases():
+    global author_alias_loaded
+    if author_alias_loaded:
+        return
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('SELECT alias, author_key FROM author_aliases')
+        author_alias_cache.update(c.fetchall())
+        c.execute('SELECT author_key FROM author_identities WHERE email IS NOT NULL')
+        author_email_keys.update(row[0] for row in c.fetchall())
+    author_alias_loaded = True
+
+def resolve_author_key(name, email=None):
+    """Canonical author key for a commit author, registering new identities and aliases."""
+    mailmap = get_author_mailmap()
+    name_alias = author_alias(name=name)
+    email_alias = author_alias(email=email) if email else None
+    name_alias = mailmap.get(name_alias, name_alias)
+    if email_alias:
+        email_alias = mailmap.get(email_alias, email_alias)
+        if email_alias.startswith('name:'):
+            # Mailmap folded this email into a name
+            name_alias, email_alias, email = email_alias, None, None
+    with author_alias_lock:
+        load_author_aliases()
+        key = author_alias_cache.get(email_alias) if email_alias else None
+        if key is None:
+            by_name = author_alias_cache.get(name_alias)
+            # A same-named identity is only adopted while it has no email of its own
+            if by_name is not None and (email_alias is None or by_name not in author_email_keys):
+                key = by_name
+        if key is None:
+            key = email_alias or name_alias
+        new_aliases = [(alias, key) for alias in (email_alias, name_alias)
+                       if alias and alias not in author_alias_cache]
+        gains_email = bool(email_alias) and key not in author_email_keys
+        if new_aliases or gains_email:
+            with db_lock, connect_db() as conn:
+                c = conn.cursor()
+                c.executemany('INSERT OR IGNORE INTO author_aliases (alias, author_key) VALUES (?, ?)', new_aliases)
+                c.execute('''INSERT INTO author_identities (author_key, display_name, email) VALUES (?, ?, ?)
+                             ON CONFLICT(author_key) DO UPDATE SET email=COALESCE(author_identities.email, excluded.email)''',
+                          (key, ' '.join((name or 'Unknown').split()), normalize_author_email(email) or None))
+                conn.commit()
+            author_alias_cache.update(new_aliases)
+            if gains_email:
+                author_email_keys.add(key)
+        return key
+
+# Daily rollups
+# Builds, deployments and commits are folded into per-project, per-day counters in SQLite.
+# Only days that are not covered yet (plus the still-open current day) are fetched from
+# Azure DevOps; any period or custom date range is then answered from prefix sums.
+DAY_MS = 86400 * 1000
+EPOCH = datetime(1970, 1, 1)
+ROLLUP_REFRESH_SEC = 300 * HOOK_TTL_FACTOR  # how often the current day is re-fetched
+ROLLUP_SYNC_CHUNK_DAYS = 30  # days fetched per step of a backfill or tail catch-up
+ROLLUP_COLUMNS = (
+    'builds', 'successful_builds', 'build_duration_sum_ms', 'build_duration_count',
+    'deployments', 'successful_deployments', 'deployments_test', 'deployments_staging',
+    'deployments_production', 'deployments_other', 'commits',
+)
+ROLLUP_ENV_COLUMNS = {'Test': 'deployments_test', 'Staging': 'deployments_staging', 'Production': 'deployments_production'}
+
+rollup_prefix_cache = {}  # project -> {'first_day': int, 'prefix': {column: np.ndarray}}
+rollup_sync_locks = {}
+rollup_sync_locks_guard = Lock()
+
+def epoch_day(dt):
+    return (dt - EPOCH).days
+
+def day_start(day):
+    return EPOCH + timedelta(days=day)
+
+def aggregate_daily_rollups(events, first_day, last_day):
+    """
+    Bins an EventTable into per-day counters for days first_day..last_day (inclusive).
+    Returns ({column: np.ndarray}, {(day, author): commits}).
+    """
+    n_days = last_day - first_day + 1
+    day_index = np.floor_divide(events.end_ms, DAY_MS) - first_day
+    in_range = (events.end_ms != EPOCH_MISSING) & (day_index >= 0) & (day_index < n_days)
+
+    def binned(mask, weights=None):
+        mask = mask & in_range
+        w = None if weights is None else weights[mask]
+        return np.bincount(day_index[mask], weights=w, minlength=n_days).astype(np.int64)
+
+    columns = {}
+    builds = events.mask(EVENT_BUILD)
+    succeeded_result = events.codes['result'] == events.pools['result'].lookup('succeeded')
+    has_duration = events.duration_ms > 0
+    columns['builds'] = binned(builds)
+    columns['successful_builds'] = binned(builds & succeeded_result)
+    columns['build_duration_sum_ms'] = binned(builds & has_duration, events.duration_ms)
+    columns['build_duration_count'] = binned(builds & has_duration)
+
+    deployments = events.mask(EVENT_DEPLOYMENT)
+    succeeded_status = events.codes['status'] == events.pools['status'].lookup('succeeded')
+    columns['deployments'] = binned(deployments)
+    columns['successful_deployments'] = binned(deployments & succeeded_status)
+    # Bucket each distinct environment name once, then bin by bucket
+    env_pool = events.pools['environment']
+    env_buckets = np.array([environment_bucket(name) for name in env_pool.values], dtype=object)
+    env_of_event = env_buckets[events.codes['environment']]
+    other = deployments.copy()
+    for bucket, column in ROLLUP_ENV_COLUMNS.items():
+        bucket_mask = deployments & (env_of_event == bucket)
+        columns[column] = binned(bucket_mask)
+        other &= ~bucket_mask
+    columns['deployments_other'] = binned(other)
+
+    commits = events.mask(EVENT_COMMIT)
+    columns['commits'] = binned(commits)
+    author_counts = {}
+    commit_mask = commits & in_range & (events.codes['author'] != 0)
+    if commit_mask.any():
+        author_pool = events.pools['author']
+        keys, counts = np.unique(np.stack([day_index[commit_mask], events.codes['author'][commit_mask]]), axis=1, return_counts=True)
+        # Each distinct 'Name <email>' is resolved to its canonical author once; aliases add up
+        author_keys = {}
+        for (idx, code), count in zip(keys.T, counts):
+            if code not in author_keys:
+                author_keys[code] = resolve_author_key(*parse_author_label(author_pool.values[code]))
+            day_author = (first_day + int(idx), author_keys[code])
+            author_counts[day_author] = author_counts.get(day_author, 0) + int(count)
+    return columns, author_counts
+
+def fetch_rollup_events(project_name, start_dt, end_dt):
+    """Fetches builds, deployments and commits finished in [start_dt, end_dt) into an EventTable."""
+    organization_name = get_devops_org_name()
+    start_iso = start_dt.isoformat() + "Z"
+    end_iso = end_dt.isoformat() + "Z"
+    builds = get_builds_for_project(project_name, start_iso, end_iso)
+    deployments = get_all_deployments_for_project(organization_name, project_name, start_iso, end_iso)
+    commits = []
+    for repo in get_repos_data(project_name):
+        commits.extend(get_all_commits_data(organization_name, project_name, repo['id'], start_iso, end_iso))
+    return EventTable.from_events(builds=builds, deployments=deployments, commits=commits)
+
+def write_daily_rollups(project_name, first_day, last_day, columns, author_counts):
+    """Replaces the rollup rows of days first_day..last_day for a project."""
+    store_key = org_scoped(project_name)
+    placeholders = ', '.join('?' for _ in ROLLUP_COLUMNS)
+    rows = []
+    for i, day in enumerate(range(first_day, last_day + 1)):
+        values = [int(columns[name][i]) for name in ROLLUP_COLUMNS]
+        if any(values):
+            rows.append((store_key, day, *values))
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('DELETE FROM daily_rollups WHERE project=? AND day BETWEEN ? AND ?', (store_key, first_day, last_day))
+        c.execute('DELETE FROM daily_commit_authors WHERE project=? AND day BETWEEN ? AND ?', (store_key, first_day, last_day))
+        c.executemany(f'INSERT INTO daily_rollups (project, day, {", ".join(ROLLUP_COLUMNS)}) VALUES (?, ?, {placeholders})', rows)
+        c.executemany('INSERT INTO daily_commit_authors (project, day, author, commits) VALUES (?, ?, ?, ?)',
+                      [(store_key, day, author, count) for (day, author), count in author_counts.items()])
+        conn.commit()
+    rollup_prefix_cache.pop(store_key, None)
+
+def get_rollup_coverage(project_name):
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('SELECT first_day, last_day, synced_at FROM rollup_coverage WHERE project=?', (org_scoped(project_name),))
+        return c.fetchone()
+
+def set_rollup_coverage(project_name, first_day, last_day, synced_at):
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO rollup_coverage (project, first_day, last_day, synced_at) VALUES (?, ?, ?, ?)
+                     ON CONFLICT(project) DO UPDATE SET first_day=excluded.first_day, last_day=excluded.last_day, synced_at=excluded.synced_at''',
+                  (org_scoped(project_name), first_day, last_day, synced_at))
+        conn.commit()
+
+def get_rollup_sync_lock(project_name):
+    with rollup_sync_locks_guard:
+        return rollup_sync_locks.setdefault(org_scoped(project_name), Lock())
+
+def sync_project_rollups(project_name, first_day):
+    """
+    Makes sure daily_rollups covers first_day..today for a project. The first sync fetches the
+    last DORA_BOOTSTRAP_DAYS days; older days are backfilled newest first and the tail (last
+    covered day up to now) oldest first, in chunks of ROLLUP_SYNC_CHUNK_DAYS whose coverage is
+    stored one by one, so a sync cut short by the route deadline resumes where it stopped.
+    The tail is re-fetched every ROLLUP_REFRESH_SEC.
+    """
+    with get_rollup_sync_lock(project_name):
+        now_utc = datetime.utcnow()
+        today = epoch_day(now_utc)
+        coverage = get_rollup_coverage(project_name)
+        if coverage is None:
+            # Start with enough history for the DORA engine, which only moves forward in time
+            bootstrap_first = today - DORA_BOOTSTRAP_DAYS + 1
+            app.logger.info(f"[ROLLUP] {project_name}: initial sync of days {bootstrap_first}..{today}")
+            events = fetch_rollup_events(project_name, day_start(bootstrap_first), now_utc)
+            write_daily_rollups(project_name, bootstrap_first, today, *aggregate_daily_rollups(events, bootstrap_first, today))
+            apply_dora_events(project_name, events, bootstrap_first)
+            coverage = (bootstrap_first, today, time.time())
+            set_rollup_coverage(project_name, *coverage)
+        covered_first, covered_last, synced_at = coverage
+        while first_day < covered_first:
+            chunk_first = max(first_day, covered_first - ROLLUP_SYNC_CHUNK_DAYS)
+            app.logger.info(f"[ROLLUP] {project_name}: backfilling days {chunk_first}..{covered_first - 1}")
+            events = fetch_rollup_events(project_name, day_start(chunk_first), day_start(covered_first))
+            write_daily_rollups(project_name, chunk_first, covered_first - 1, *aggregate_daily_rollups(events, chunk_first, covered_first - 1))
+            covered_first = chunk_first
+            set_rollup_coverage(project_name, covered_first, covered_last, synced_at)
+        if covered_last < today or time.time() - synced_at >= ROLLUP_REFRESH_SEC:
+            while True:
+                # covered_last may be partial, so every chunk starts by re-fetching it
+                chunk_last = min(today, covered_last + ROLLUP_SYNC_CHUNK_DAYS)
+                app.logger.info(f"[ROLLUP] {project_name}: refreshing days {covered_last}..{chunk_last}")
+                chunk_end = now_utc if chunk_last == today else day_start(chunk_last + 1)
+                events = fetch_rollup_events(project_name, day_start(covered_last), chunk_end)
+                write_daily_rollups(project_name, covered_last, chunk_last, *aggregate_daily_rollups(events, covered_last, chunk_last))
+                apply_dora_events(project_name, events, covered_last)
+                covered_last = chunk_last
+                if covered_last == today:
+                    synced_at = time.time()
+                set_rollup_coverage(project_name, covered_first, covered_last, synced_at)
+                if covered_last == today:
+                    break
+
+def apply_rollup_events(project_name, events, delivery=None):
+    """
+    Adds individual events (e.g. from a service hook) to the already covered rollup days.
+    Days outside the coverage are skipped; they are fetched when a query first needs them.
+    delivery (see claim_hook_delivery) is claimed in the same transaction as the writes, so
+    a redelivered hook is applied at most once and a failed one can be retried.
+    Returns the number of days touched, or None if the delivery was already processed.
+    """
+    with get_rollup_sync_lock(project_name):
+        coverage = get_rollup_coverage(project_name)
+        rows = []
+        author_counts = {}
+        store_key = org_scoped(project_name)
+        if coverage is not None and len(events):
+            first_day, last_day, _ = coverage
+            # Resolving authors writes to SQLite itself, so aggregate before taking db_lock
+            columns, author_counts = aggregate_daily_rollups(events, first_day, last_day)
+            for i, day in enumerate(range(first_day, last_day + 1)):
+                values = [int(columns[name][i]) for name in ROLLUP_COLUMNS]
+                if any(values):
+                    rows.append((store_key, day, *values))
+        with db_lock, connect_db() as conn:
+            c = conn.cursor()
+            if not claim_hook_delivery(c, delivery):
+                return None
+            if coverage is None or len(events) == 0:
+                conn.commit()
+                return 0
+            dora_changed = _apply_dora_events(c, project_name, events, first_day)
+            placeholders = ', '.join('?' for _ in ROLLUP_COLUMNS)
+            increments = ', '.join(f'{name}={name}+excluded.{name}' for name in ROLLUP_COLUMNS)
+            c.executemany(f'''INSERT INTO daily_rollups (project, day, {", ".join(ROLLUP_COLUMNS)}) VALUES (?, ?, {placeholders})
+                              ON CONFLICT(project, day) DO UPDATE SET {increments}''', rows)
+            c.executemany('''INSERT INTO daily_commit_authors (project, day, author, commits) VALUES (?, ?, ?, ?)
+                             ON CONFLICT(project, day, author) DO UPDATE SET commits=commits+excluded.commits''',
+                          [(store_key, day, author, count) for (day, author), count in author_counts.items()])
+            conn.commit()
+        if dora_changed:
+            invalidate_dora_prefix(project_name)
+        rollup_prefix_cache.pop(store_key, None)
+        return len(rows)
+
+def get_rollup_prefix(project_name):
+    """Returns cumulative sums of every rollup column over the covered days (cached until the next write)."""
+    store_key = org_scoped(project_name)
+    cached = rollup_prefix_cache.get(store_key)
+    if cached is not None:
+        return cached
+    coverage = get_rollup_coverage(project_name)
+    if coverage is None:
+        return None
+    first_day, last_day, _ = coverage
+    n_days = last_day - first_day + 1
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute(f'SELECT day, {", ".join(ROLLUP_COLUMNS)} FROM daily_rollups WHERE project=? AND day BETWEEN ? AND ?',
+                  (store_key, first_day, last_day))
+        rows = c.fetchall()
+    dense = np.zeros((len(ROLLUP_COLUMNS), n_days), dtype=np.int64)
+    for row in rows:
+        dense[:, row[0] - first_day] = row[1:]
+    prefix = np.zeros((len(ROLLUP_COLUMNS), n_days + 1), dtype=np.int64)
+    np.cumsum(dense, axis=1, out=prefix[:, 1:])
+    cached = {'first_day': first_day, 'last_day': last_day, 'prefix': dict(zip(ROLLUP_COLUMNS, prefix))}
+    rollup_prefix_cache[store_key] = cached
+    return cached
+
+def query_rollup_range(project_name, first_day, last_day):
+    """
+    Sums every rollup column over days first_day..last_day (inclusive), syncing missing days
+    first. Each column is answered with one prefix-sum subtraction.
+    """
+    sync_project_rollups(project_name, first_day)
+    rollup = get_rollup_prefix(project_name)
+    lo = max(first_day, rollup['first_day']) - rollup['first_day']
+    hi = min(last_day, rollup['last_day']) - rollup['first_day'] + 1
+    if hi <= lo:
+        return {name: 0 for name in ROLLUP_COLUMNS}
+    return {name: int(p[hi] - p[lo]) for name, p in rollup['prefix'].items()}
+
+def query_top_committers(project_name, first_day, last_day, k=5):
+    return [{"name": entry["name"], "commit_count": entry["commits"]}
+            for entry in query_leaderboard(first_day, last_day, k, project_name)["leaderboard"]]
+
+def query_leaderboard(first_day, last_day, k, project_name=None):
+    """
+    Top-k authors by commits over days first_day..last_day, for one project or (project_name
+    None) every project of the current organization. Only reads the stored counters.
+    """
+    if project_name is not None:
+        scope_sql, scope_args = 'project=?', (org_scoped(project_name),)
+    else:
+        namespace = org_scoped('')
+        if namespace:
+            scope_sql, scope_args = 'substr(project, 1, ?)=?', (len(namespace), namespace)
+        else:
+            scope_sql, scope_args = "instr(project, '/')=0", ()
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute(f'''SELECT author, SUM(commits), COUNT(DISTINCT project) FROM daily_commit_authors
+                      WHERE {scope_sql} AND day BETWEEN ? AND ? GROUP BY author''', (*scope_args, first_day, last_day))
+        totals = c.fetchall()
+        total_commits = sum(row[1] for row in totals)
+        # Bounded heap instead of sorting every author
+        top = heapq.nsmallest(k, totals, key=lambda row: (-row[1], row[0]))
+        identities = {}
+        if top:
+            c.execute(f'SELECT author_key, display_name, email FROM author_identities WHERE author_key IN ({", ".join("?" for _ in top)})',
+                      [row[0] for row in top])
+            identities = {key: (name, email) for key, name, email in c.fetchall()}
+    leaderboard = []
+    for rank, (key, commits, projects) in enumerate(top, start=1):
+        name, email = identities.get(key, (key.split(':', 1)[-1], None))
+        entry = {"rank": rank, "name": name, "email": email, "commits": commits,
+                 "share": round(commits / total_commits * 100, 2)}
+        if project_name is None:
+            entry["projects"] = projects
+        leaderboard.append(entry)
+    return {"total_commits": total_commits, "authors": len(totals), "leaderboard": leaderboard}
+
+# DORA metrics engine
+# Production deployments and default-branch commits are streamed through a small state
+# machine in time order; each event updates per-day running aggregates in dora_daily:
+# - deployment frequency: successful production deployments per day
+# - lead time for changes: for every commit, time until the next successful production
+#   deployment (pending commits are kept as a count and a timestamp sum, so a deployment
+#   settles all of them in O(1))
+# - change failure rate: failed / all production deployments
+# - time to restore: first failed production deployment until the next successful one
+# Deployments and commits are applied once per id, so re-fetched days and service hook replays
+# are not applied twice (deployments without an id fall back to the watermark, the latest
+# production deployment applied). A deployment older than the watermark (a delayed hook, or one
+# the hooks missed and a re-sync picked up) still counts towards frequency and failure rate,
+# but can't reorder the stream: its commits are settled by the next deployment and a late
+# failure opens no restore window. Commits are timestamped with their author date, which is usually before the push: one arriving
+# after a later deployment is settled by the next successful deployment instead of dropped. Reads are prefix-sum subtractions, per project or
+# org-wide (project DORA_ORG; like every store key it is namespaced per organization).
+DORA_ORG = '*'
+DORA_BOOTSTRAP_DAYS = 30
+DORA_ID_RETENTION_DAYS = 90  # tail re-syncs never go back further than this
+DORA_COLUMNS = (
+    'deployments', 'successful_deployments', 'failed_deployments',
+    'lead_time_sum_ms', 'lead_time_count', 'restore_sum_ms', 'restore_count',
+)
+
+dora_prefix_cache = {}  # project -> {'first_day': int, 'last_day': int, 'prefix': {column: np.ndarray}}
+
+def _get_dora_state(c, project_name):
+    c.execute('SELECT watermark_ms, pending_commits, pending_commit_ms_sum, open_failure_ms, first_day FROM dora_state WHERE project=?',
+              (org_scoped(project_name),))
+    return c.fetchone()
+
+def invalidate_dora_prefix(project_name):
+    dora_prefix_cache.pop(org_scoped(project_name), None)
+    dora_prefix_cache.pop(org_scoped(DORA_ORG), None)
+
+def apply_dora_events(project_name, events, first_day):
+    """
+    Feeds an EventTable into the DORA engine of a project (callers hold its rollup sync lock).
+    first_day is where a project's DORA history starts if it has no state yet.
+    Returns the number of production deployments applied.
+    """
+    with db_lock, connect_db() as conn:
+        applied = _apply_dora_events(conn.cursor(), project_name, events, first_day)
+        conn.commit()
+    if applied:
+        invalidate_dora_prefix(project_name)
+    return applied
+
+def _apply_dora_events(c, project_name, events, first_day):
+    """apply_dora_events inside the caller's transaction (the caller drops the prefix cache)."""
+    state = _get_dora_state(c, project_name)
+    if state is None:
+        state = (first_day * DAY_MS - 1, 0, 0, None, first_day)
+    watermark_ms, pending_commits, pending_sum, open_failure_ms, history_first_day = state
+    has_time = events.end_ms != EPOCH_MISSING
+
+    store_key, org_store_key = org_scoped(project_name), org_scoped(DORA_ORG)
+    commit_pool = events.pools['commit']
+    new_commit_ms = []
+    for index in np.flatnonzero(events.mask(EVENT_COMMIT) & has_time):
+        authored_ms = int(events.end_ms[index])
+        commit_id = commit_pool.values[events.codes['commit'][index]]
+        if commit_id is None:
+            # No id to deduplicate on: fall back to the deployment watermark
+            is_new = authored_ms > watermark_ms
+        else:
+            c.execute('INSERT OR IGNORE INTO dora_commits (project, commit_id, day) VALUES (?, ?, ?)',
+                      (store_key, commit_id, authored_ms // DAY_MS))
+            is_new = c.rowcount == 1
+        if is_new:
+            new_commit_ms.append(authored_ms)
+    commit_ms = np.sort(np.array(new_commit_ms, dtype=np.int64))
+    commit_ms_cumsum = np.concatenate(([0], np.cumsum(commit_ms)))
+    env_pool = events.pools['environment']
+    production_codes = [code for code, name in enumerate(env_pool.values) if environment_bucket(name) == 'Production']
+    production = (events.mask(EVENT_DEPLOYMENT) & has_time & (events.end_ms >= history_first_day * DAY_MS)
+                  & np.isin(events.codes['environment'], production_codes))
+    deployment_pool = events.pools['deployment']
+    new_deployments = []
+    for index in np.flatnonzero(production):
+        deployed_ms = int(events.end_ms[index])
+        deployment_id = deployment_pool.values[events.codes['deployment'][index]]
+        if deployment_id is None:
+            is_new = deployed_ms > watermark_ms
+        else:
+            c.execute('INSERT OR IGNORE INTO dora_deployments (project, deployment_id, day) VALUES (?, ?, ?)',
+                      (store_key, deployment_id, deployed_ms // DAY_MS))
+            is_new = c.rowcount == 1
+        if is_new:
+            new_deployments.append(index)
+    order = np.array(new_deployments, dtype=np.int64)
+    order = order[np.argsort(events.end_ms[order], kind='stable')]
+    status_pool = events.pools['status']
+    succeeded_code = status_pool.lookup('succeeded')
+    failed_code = status_pool.lookup('failed')
+
+    daily = {}
+    commits_taken = 0
+    for index in order:
+        deployed_ms = int(events.end_ms[index])
+        day = deployed_ms // DAY_MS
+        row = daily.setdefault(day, dict.fromkeys(DORA_COLUMNS, 0))
+        row['deployments'] += 1
+        status = events.codes['status'][index]
+        if deployed_ms <= watermark_ms:
+            # Out of order: counted, but the stream state has already moved past it
+            if status == failed_code:
+                row['failed_deployments'] += 1
+            elif status == succeeded_code:
+                row['successful_deployments'] += 1
+        elif status == failed_code:
+            row['failed_deployments'] += 1
+            if open_failure_ms is None:
+                open_failure_ms = deployed_ms
+        elif status == succeeded_code:
+            row['successful_deployments'] += 1
+            # Commits made up to this deployment are now in production
+            upto = int(np.searchsorted(commit_ms, deployed_ms, side='right'))
+            pending_commits += upto - commits_taken
+            pending_sum += int(commit_ms_cumsum[upto] - commit_ms_cumsum[commits_taken])
+            commits_taken = upto
+            if pending_commits:
+                row['lead_time_sum_ms'] += pending_commits * deployed_ms - pending_sum
+                row['lead_time_count'] += pending_commits
+                pending_commits = pending_sum = 0
+            if open_failure_ms is not None:
+                row['restore_sum_ms'] += deployed_ms - open_failure_ms
+                row['restore_count'] += 1
+                open_failure_ms = None
+    pending_commits += commit_ms.size - commits_taken
+    pending_sum += int(commit_ms_cumsum[-1] - commit_ms_cumsum[commits_taken])
+    # Only production deployments move the watermark; builds and commits are not ordered by it
+    if order.size:
+        watermark_ms = max(watermark_ms, int(events.end_ms[order].max()))
+
+    placeholders = ', '.join('?' for _ in DORA_COLUMNS)
+    increments = ', '.join(f'{name}={name}+excluded.{name}' for name in DORA_COLUMNS)
+    rows = [(key, day, *(row[name] for name in DORA_COLUMNS))
+            for day, row in daily.items() for key in (store_key, org_store_key)]
+    c.executemany(f'''INSERT INTO dora_daily (project, day, {", ".join(DORA_COLUMNS)}) VALUES (?, ?, {placeholders})
+                      ON CONFLICT(project, day) DO UPDATE SET {increments}''', rows)
+    c.execute('''INSERT INTO dora_state (project, watermark_ms, pending_commits, pending_commit_ms_sum, open_failure_ms, first_day)
+                 VALUES (?, ?, ?, ?, ?, ?)
+                 ON CONFLICT(project) DO UPDATE SET watermark_ms=excluded.watermark_ms, pending_commits=excluded.pending_commits,
+                     pending_commit_ms_sum=excluded.pending_commit_ms_sum, open_failure_ms=excluded.open_failure_ms''',
+              (store_key, watermark_ms, pending_commits, pending_sum, open_failure_ms, history_first_day))
+    retention_day = epoch_day(datetime.utcnow()) - DORA_ID_RETENTION_DAYS
+    c.execute('DELETE FROM dora_commits WHERE project=? AND day < ?', (store_key, retention_day))
+    c.execute('DELETE FROM dora_deployments WHERE project=? AND day < ?', (store_key, retention_day))
+    return len(order)
+
+def get_dora_prefix(project_name):
+    """Cumulative sums of every DORA column from the first recorded day (cached until the next write)."""
+    store_key = org_scoped(project_name)
+    cached = dora_prefix_cache.get(store_key)
+    if cached is not None:
+        return cached
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute(f'SELECT day, {", ".join(DORA_COLUMNS)} FROM dora_daily WHERE project=? ORDER BY day', (store_key,))
+        rows = c.fetchall()
+    if not rows:
+        return None
+    first_day, last_day = rows[0][0], rows[-1][0]
+    dense = np.zeros((len(DORA_COLUMNS), last_day - first_day + 1), dtype=np.int64)
+    for row in rows:
+        dense[:, row[0] - first_day] = row[1:]
+    prefix = np.zeros((len(DORA_COLUMNS), dense.shape[1] + 1), dtype=np.int64)
+    np.cumsum(dense, axis=1, out=prefix[:, 1:])
+    cached = {'first_day': first_day, 'last_day': last_day, 'prefix': dict(zip(DORA_COLUMNS, prefix))}
+    dora_prefix_cache[store_key] = cached
+    return cached
+
+def query_dora_metrics(project_name, first_day, last_day):
+    """DORA metrics over days first_day..last_day (inclusive) from the engine's prefix sums."""
+    days = last_day - first_day + 1
+    totals = dict.fromkeys(DORA_COLUMNS, 0)
+    dora = get_dora_prefix(project_name)
+    if dora is not None:
+        lo = max(first_day, dora['first_day']) - dora['first_day']
+        hi = min(last_day, dora['last_day']) - dora['first_day'] + 1
+        if hi > lo:
+            totals = {name: int(p[hi] - p[lo]) for name, p in dora['prefix'].items()}
+    hour_ms = 3600 * 1000
+    return {
+        "days": days,
+        "production_deployments": totals['deployments'],
+        "deployment_frequency_per_day": round(totals['successful_deployments'] / days, 2),
+        "lead_time_hours": round(totals['lead_time_sum_ms'] / totals['lead_time_count'] / hour_ms, 2) if totals['lead_time_count'] else None,
+        "change_failure_rate": round(totals['failed_deployments'] / totals['deployments'] * 100, 2) if totals['deployments'] else None,
+        "time_to_restore_hours": round(totals['restore_sum_ms'] / totals['restore_count'] / hour_ms, 2) if totals['restore_count'] else None,
+        "deployments_restored": totals['restore_count'],
+    }
+
+def get_activity_periods():
+    now_utc = datetime.utcnow()
+    today_start_utc = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "daily": {"start": today_start_utc, "end": now_utc},
+        "weekly": {"start": now_utc - timedelta(days=7), "end": now_utc},
+        "monthly": {"start": now_utc - timedelta(days=30), "end": now_utc}
+    }
+
+def iter_project_activity(organization_name, project_name, periods):
+    """Yields (period_name, {"pipeline_runs", "releases", "commits"}) for one project, period by period."""
+    for period_name, dates in periods.items():
+        start_date_iso = dates["start"].isoformat() + "Z"
+        end_date_iso = dates["end"].isoformat() + "Z"
+
+        app.logger.debug(f"Project: {project_name}, Period: {period_name}, Range: {start_date_iso} to {end_date_iso}")
+
+        pipeline_runs = get_pipeline_runs_count_for_project(organization_name, project_name, start_date_iso, end_date_iso)
+        app.logger.info(f"Project {project_name}, Period {period_name}: {pipeline_runs} pipeline runs.")
+
+        # get_all_deployments_for_project no longer takes pat
+        deployments_list = get_all_deployments_for_project(organization_name, project_name, start_date_iso, end_date_iso) # REMOVED pat
+        releases_count = len(deployments_list)
+        app.logger.info(f"Project {project_name}, Period {period_name}: {releases_count} releases.")
+
+        # get_commits_count_for_project no longer takes pat
+        commits_count = get_commits_count_for_project(organization_name, project_name, start_date_iso, end_date_iso) # REMOVED pat
+        app.logger.info(f"Project {project_name}, Period {period_name}: {commits_count} commits.")
+
+        yield period_name, {"pipeline_runs": pipeline_runs, "releases": releases_count, "commits": commits_count}
+
+def add_activity(totals, activity):
+    for period_name, counts in activity.items():
+        for metric, value in counts.items():
+            totals[period_name][metric] += value
+
+def empty_activity(periods):
+    return {period_name: {"pipeline_runs": 0, "releases": 0, "commits": 0} for period_name in periods}
+
+def sse_event(event, data):
+    import json
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# SSE comment line; writing it between upstream calls lets the server notice a closed
+# connection (the generator is closed at the next yield) and stop fetching.
+SSE_KEEPALIVE = ": keep-alive\n\n"
+
+def sse_response(generator):
+    return Response(stream_with_context(generator), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Last complete activity summary, served (marked stale) when Azure DevOps is unavailable
+ACTIVITY_SUMMARY_CACHE_KEY = 'activity-summary'
 
 @app.route('/api/activity_summary', methods=['GET']) # REMOVED backslashes
+@with_budget(60)
 def activity_summary():
     app.logger.info("Activity summary endpoint called.")
     try:
@@ -350,7 +1903,7 @@ def activity_summary():
         
         if not org_url_full: 
             raise ValueError("Azure DevOps Org URL not configured.")
-        organization_name = org_url_full.split('/')[-1] # REMOVED backslashes
+        organization_name = get_devops_org_name()
         
         app.logger.info(f"Operating for organization: {organization_name}")
 
@@ -359,20 +1912,9 @@ def activity_summary():
             app.logger.warning("No projects found for the organization.")
             return jsonify({"message": "No projects found for the organization. Please check PAT and Org URL."}), 404
 
-        now_utc = datetime.utcnow()
-        
-        today_start_utc = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        periods = {
-            "daily": {"start": today_start_utc, "end": now_utc},
-            "weekly": {"start": now_utc - timedelta(days=7), "end": now_utc},
-            "monthly": {"start": now_utc - timedelta(days=30), "end": now_utc}
-        }
-        
-        summary_data = {
-            period_name: {"pipeline_runs": 0, "releases": 0, "commits": 0}
-            for period_name in periods
-        }
+        periods = get_activity_periods()
+        summary_data = empty_activity(periods)
+        errors = []
 
         for project in projects:
             project_name = project.get('name') # REMOVED backslashes
@@ -380,47 +1922,91 @@ def activity_summary():
                 app.logger.warning(f"Project found with no name: {project.get('id')}. Skipping.") # REMOVED backslashes
                 continue
             app.logger.info(f"Processing project: {project_name}")
-
-            for period_name, dates in periods.items():
-                start_date_iso = dates["start"].isoformat() + "Z"
-                end_date_iso = dates["end"].isoformat() + "Z"
-                
-                app.logger.debug(f"Project: {project_name}, Period: {period_name}, Range: {start_date_iso} to {end_date_iso}")
-                                
-                pipeline_runs = get_pipeline_runs_count_for_project(organization_name, project_name, start_date_iso, end_date_iso)
-                summary_data[period_name]["pipeline_runs"] += pipeline_runs
-                app.logger.info(f"Project {project_name}, Period {period_name}: {pipeline_runs} pipeline runs.")
-
-                # get_all_deployments_for_project no longer takes pat
-                deployments_list = get_all_deployments_for_project(organization_name, project_name, start_date_iso, end_date_iso) # REMOVED pat
-                releases_count = len(deployments_list)
-                summary_data[period_name]["releases"] += releases_count
-                app.logger.info(f"Project {project_name}, Period {period_name}: {releases_count} releases.")
-                
-                # get_commits_count_for_project no longer takes pat
-                commits_count = get_commits_count_for_project(organization_name, project_name, start_date_iso, end_date_iso) # REMOVED pat
-                summary_data[period_name]["commits"] += commits_count
-                app.logger.info(f"Project {project_name}, Period {period_name}: {commits_count} commits.")
+            try:
+                add_activity(summary_data, dict(iter_project_activity(organization_name, project_name, periods)))
+            except requests.exceptions.RequestException as e:
+                app.logger.error(f"Skipping project {project_name} in activity_summary: {e}")
+                errors.append({"project": project_name, "error": upstream_error_message(e)})
 
         app.logger.info(f"Final aggregated summary data: {summary_data}")
-        return jsonify(summary_data)
+        if not errors:
+            import json
+            set_cache(ACTIVITY_SUMMARY_CACHE_KEY, json.dumps(summary_data))
+        return partial_response(summary_data, errors)
 
     except ValueError as ve: 
         app.logger.error(f"Configuration error in activity_summary: {ve}", exc_info=True)
         return jsonify({"error": str(ve)}), 500
     except requests.exceptions.HTTPError as hre:
         app.logger.error(f"Azure DevOps API HTTP error in activity_summary: {hre.response.text if hre.response else hre}", exc_info=True)
+        stale = stale_response(ACTIVITY_SUMMARY_CACHE_KEY, hre)
+        if stale is not None:
+            return stale
         status_code = hre.response.status_code if hre.response is not None else 503
         return jsonify({"error": f"Azure DevOps API request error: {hre}", "details": hre.response.text if hre.response else "No response body"}), status_code
     except requests.exceptions.RequestException as re:
         app.logger.error(f"Azure DevOps API request error in activity_summary: {re}", exc_info=True)
+        stale = stale_response(ACTIVITY_SUMMARY_CACHE_KEY, re)
+        if stale is not None:
+            return stale
         return jsonify({"error": f"Azure DevOps API request error: {re}"}), 503
     except Exception as e:
         app.logger.error(f"An unexpected error occurred in activity_summary: {e}", exc_info=True)
         return jsonify({"error": "An unexpected error occurred processing your request."}), 500
 
+@app.route('/api/activity_summary/stream', methods=['GET'])
+@with_budget(600)
+def activity_summary_stream():
+    """
+    Server-Sent Events variant of /api/activity_summary. Emits a `project` event with the
+    project's counts and the running totals as each project completes, then `done` whose
+    `result` equals the non-streaming response. Closing the connection stops the upstream work.
+    """
+    app.logger.info("Activity summary stream endpoint called.")
+
+    def generate():
+        completed = 0
+        try:
+            organization_name = get_devops_org_name()
+            projects = [p for p in get_projects_data() if p.get('name')]
+            if not projects:
+                yield sse_event('error', {"message": "No projects found for the organization. Please check PAT and Org URL."})
+                return
+            periods = get_activity_periods()
+            totals = empty_activity(periods)
+            errors = []
+            for project in projects:
+                project_name = project['name']
+                activity = {}
+                try:
+                    for period_name, counts in iter_project_activity(organization_name, project_name, periods):
+                        activity[period_name] = counts
+                        yield SSE_KEEPALIVE
+                except requests.exceptions.RequestException as e:
+                    app.logger.error(f"Skipping project {project_name} in activity_summary stream: {e}")
+                    errors.append({"project": project_name, "error": upstream_error_message(e)})
+                    activity = None
+                else:
+                    add_activity(totals, activity)
+                completed += 1
+                event = {"project": project_name, "activity": activity, "totals": totals,
+                         "completed": completed, "total": len(projects)}
+                if activity is None:
+                    event["error"] = errors[-1]["error"]
+                yield sse_event('project', event)
+            yield sse_event('done', {"result": {**totals, "partial": True, "errors": errors} if errors else totals})
+        except GeneratorExit:
+            app.logger.info(f"[SSE] activity_summary stream closed by client after {completed} projects.")
+            raise
+        except Exception as e:
+            app.logger.error(f"Error in activity_summary stream: {e}", exc_info=True)
+            yield sse_event('error', {"error": str(e), "completed": completed})
+
+    return sse_response(generate())
+
 # API endpoints
 @app.route('/api/projects', methods=['GET'])
+@with_budget(15)
 def list_projects():
     try:
         projects = get_projects_data()
@@ -432,11 +2018,15 @@ def list_projects():
     except requests.exceptions.HTTPError as http_err:
         app.logger.error(f"HTTP error fetching projects: {http_err.response.status_code} - {http_err.response.text[:200]}")
         return jsonify({"error": "Failed to fetch projects from Azure DevOps", "details": str(http_err)}), http_err.response.status_code
+    except requests.exceptions.RequestException as re:
+        app.logger.error(f"Azure DevOps API request error fetching projects: {re}")
+        return jsonify({"error": "Failed to fetch projects from Azure DevOps", "details": upstream_error_message(re)}), 503
     except Exception as e:
         app.logger.error(f"Error fetching projects: {e}")
         return jsonify({"error": "An unexpected error occurred while fetching projects."}), 500
 
 @app.route('/api/projects/<project_name>/pipeline-counts', methods=['GET'])
+@with_budget(15)
 def get_project_pipeline_counts(project_name):
     try:
         build_pipelines = get_pipelines_data(project_name)
@@ -453,22 +2043,68 @@ def get_project_pipeline_counts(project_name):
     except requests.exceptions.HTTPError as http_err:
         app.logger.error(f"HTTP error fetching pipeline counts for {project_name}: {http_err.response.status_code} - {http_err.response.text[:200]}")
         return jsonify({"error": f"Failed to fetch pipeline counts for project {project_name}", "details": str(http_err)}), http_err.response.status_code
+    except requests.exceptions.RequestException as re:
+        app.logger.error(f"Azure DevOps API request error fetching pipeline counts for {project_name}: {re}")
+        return jsonify({"error": f"Failed to fetch pipeline counts for project {project_name}", "details": upstream_error_message(re)}), 503
     except Exception as e:
         app.logger.error(f"Error fetching pipeline counts for {project_name}: {e}")
         return jsonify({"error": f"An unexpected error occurred while fetching pipeline counts for {project_name}."}), 500
 
+MAX_HISTORY_DAYS = int(os.getenv('MAX_HISTORY_DAYS', '365'))  # how far back period/start may reach
+
+def get_period_cache_suffix(default_period='7d'):
+    """Cache key suffix for the ?period= / ?start=&end= query of the current request."""
+    # Optional custom range (YYYY-MM-DD, inclusive) instead of a trailing period
+    range_start = request.args.get('start')
+    range_end = request.args.get('end')
+    if range_start and range_end:
+        return f"{range_start}..{range_end}"
+    return request.args.get('period', default_period)
+
+def get_period_days(default_period='7d'):
+    """
+    Parses ?period= / ?start=&end= into an inclusive range of UTC days (first_day, last_day, days).
+    Raises ValueError for malformed values, a lone start/end, an end in the future (it would
+    dilute the per-day averages) and ranges reaching back more than MAX_HISTORY_DAYS, which
+    would otherwise trigger an unbounded history backfill.
+    """
+    today = epoch_day(datetime.utcnow())
+    range_start = request.args.get('start')
+    range_end = request.args.get('end')
+    if bool(range_start) != bool(range_end):
+        raise ValueError("'start' and 'end' must be given together.")
+    if range_start and range_end:
+        try:
+            first_day = epoch_day(datetime.strptime(range_start, '%Y-%m-%d'))
+            last_day = epoch_day(datetime.strptime(range_end, '%Y-%m-%d'))
+        except ValueError:
+            raise ValueError("'start' and 'end' must be dates in YYYY-MM-DD format.")
+        if last_day < first_day:
+            raise ValueError("'end' must not be before 'start'.")
+        if last_day > today:
+            raise ValueError("'end' must not be in the future.")
+        if first_day <= today - MAX_HISTORY_DAYS:
+            raise ValueError(f"'start' must be within the last {MAX_HISTORY_DAYS} days.")
+        return first_day, last_day, last_day - first_day + 1
+    # The last N days end with today
+    period = request.args.get('period', default_period)
+    if not (period.endswith('d') and period[:-1].isdigit() and 1 <= int(period[:-1]) <= MAX_HISTORY_DAYS):
+        raise ValueError(f"'period' must look like '30d', between 1d and {MAX_HISTORY_DAYS}d.")
+    days = int(period[:-1])
+    return today - days + 1, today, days
+
 @app.route('/api/projects/<project_name>/metrics', methods=['GET'])
+@with_budget(60)
 def get_project_metrics(project_name):
     import json
     from datetime import datetime
     from dateutil import parser as dtparser
-    period = request.args.get('period', '7d')
-    cache_key = f"metrics-{project_name}:{period}"
-    now = time.time()
+    cache_key = f"metrics-{project_name}:{get_period_cache_suffix()}"
     # 1. Önce in-memory cache kontrolü
-    if cache_key in metrics_cache and now - metrics_cache[cache_key]['time'] < metrics_cache_expiry:
+    cached = get_memory_cache(cache_key, metrics_cache_expiry)
+    if cached is not None:
         app.logger.info(f'[CACHE] Returning in-memory cached metrics for {cache_key}')
-        return jsonify(metrics_cache[cache_key]['data'])
+        return jsonify(cached['data'])
     # 2. Sonra SQLite cache kontrolü
     cache_data, cache_time = get_cache(cache_key)
     if cache_data:
@@ -476,35 +2112,16 @@ def get_project_metrics(project_name):
         if (datetime.utcnow() - cache_dt).total_seconds() < metrics_cache_expiry:
             app.logger.info(f'[CACHE] Returning SQLite cached metrics for {cache_key}')
             # Bellek cache'ini de güncelle
-            metrics_cache[cache_key] = {'data': json.loads(cache_data), 'time': now}
+            set_memory_cache(cache_key, json.loads(cache_data))
             return jsonify(json.loads(cache_data))
+    try:
+        first_day, last_day, days = get_period_days()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     try:
         org_url_full = get_devops_org_url()
         if not org_url_full:
             raise ValueError("Azure DevOps Org URL not configured.")
-        organization_name = org_url_full.split('/')[-1]
-
-        # Parse period
-        if period.endswith('d'):
-            days = int(period[:-1])
-        else:
-            days = 7
-        now_utc = datetime.utcnow()
-        start_utc = now_utc - timedelta(days=days)
-        start_date_iso = start_utc.isoformat() + "Z"
-        end_date_iso = now_utc.isoformat() + "Z"
-
-        # Metrics
-        pipeline_runs = get_pipeline_runs_count_for_project(organization_name, project_name, start_date_iso, end_date_iso)
-        app.logger.info(f"[METRIC] {project_name} pipeline_runs: {pipeline_runs}")
-        deployments_list = get_all_deployments_for_project(organization_name, project_name, start_date_iso, end_date_iso)
-        releases_count = len(deployments_list)
-        app.logger.info(f"[METRIC] {project_name} releases_count: {releases_count}")
-        commits_count = get_commits_count_for_project(organization_name, project_name, start_date_iso, end_date_iso)
-        app.logger.info(f"[METRIC] {project_name} commits_count: {commits_count}")
-        repos = get_repos_data(project_name)
-        repository_count = len(repos)
-        app.logger.info(f"[METRIC] {project_name} repository_count: {repository_count}")
 
         # Dashboard için toplam sayılar (adetler)
         pipelines = get_pipelines_data(project_name)
@@ -514,91 +2131,35 @@ def get_project_metrics(project_name):
         pipeline_count = len(pipelines)
         release_count = len(releases)
         repository_count = len(repos)
+        app.logger.info(f"[METRIC] {project_name} repository_count: {repository_count}")
 
-        # Son 7 gün için commit sayısı
-        org_url_full = get_devops_org_url()
-        organization_name = org_url_full.split('/')[-1]
-        now_utc = datetime.utcnow()
-        if period.endswith('d'):
-            days = int(period[:-1])
-        else:
-            days = 7
-        start_utc = now_utc - timedelta(days=days)
-        start_date_iso = start_utc.isoformat() + "Z"
-        end_date_iso = now_utc.isoformat() + "Z"
-        commit_count = get_commits_count_for_project(organization_name, project_name, start_date_iso, end_date_iso)
+        # Period counters from the daily rollup table (only uncovered days hit Azure DevOps)
+        totals = query_rollup_range(project_name, first_day, last_day)
+
+        pipeline_runs = totals['builds']
+        app.logger.info(f"[METRIC] {project_name} pipeline_runs: {pipeline_runs}")
+        releases_count = totals['deployments']
+        app.logger.info(f"[METRIC] {project_name} releases_count: {releases_count}")
+        commit_count = totals['commits']
+        app.logger.info(f"[METRIC] {project_name} commits_count: {commit_count}")
 
         # Calculate averages
         pipeline_run_avg_7d = round(pipeline_runs / days, 2) if days > 0 else pipeline_runs
         release_avg_7d = round(releases_count / days, 2) if days > 0 else releases_count
 
-        # Fetch builds for the period
-        api_version = '7.0'
-        org_url_base = get_devops_org_url()
-        builds_url = f"{org_url_base}/{project_name}/_apis/build/builds"
-        builds_params = {
-            'api-version': api_version,
-            'minTime': start_date_iso,
-            'maxTime': end_date_iso,
-            'queryOrder': 'finishTimeDescending',
-            '$top': 1000  # reasonable upper limit for 7 days
-        }
-        builds = []
-        next_url = f"{builds_url}?{urlencode(builds_params)}"
-        while next_url:
-            resp = requests.get(next_url, headers=get_headers())
-            resp.raise_for_status()
-            data = resp.json()
-            builds.extend(data.get('value', []))
-            if 'x-ms-continuationtoken' in resp.headers:
-                builds_params['continuationToken'] = resp.headers['x-ms-continuationtoken']
-                next_url = f"{builds_url}?{urlencode(builds_params)}"
-            else:
-                next_url = None
-
         # 1. En Aktif Kullanıcılar (Commit sayısına göre, Son 7 gün)
-        # Get all commits for the period
-        commits_by_author = {}
-        repos = get_repos_data(project_name)
-        for repo in repos:
-            repo_id = repo['id']
-            repo_name = repo.get('name', 'UnknownRepo')
-            commits = get_commits_data(organization_name, project_name, repo_id, start_date_iso, end_date_iso, repository_name=repo_name)
-            for commit in commits:
-                author = commit.get('author', {}).get('name', 'Unknown')
-                if author:
-                    commits_by_author[author] = commits_by_author.get(author, 0) + 1
-        top_committers = sorted(commits_by_author.items(), key=lambda x: x[1], reverse=True)[:5]
-        top_committers = [{"name": name, "commit_count": count} for name, count in top_committers]
+        top_committers = query_top_committers(project_name, first_day, last_day, 5)
 
         # 2. Release Success Rate (Son 7 gün)
-        # deployments_list already fetched
-        total_releases = len(deployments_list)
-        successful_releases = sum(1 for d in deployments_list if d.get('deploymentStatus', '').lower() == 'succeeded')
-        release_success_rate = (successful_releases / total_releases * 100) if total_releases > 0 else None
+        release_success_rate = (totals['successful_deployments'] / releases_count * 100) if releases_count > 0 else None
 
         # 3. Ortalama Build Süresi (Son 7 gün)
-        build_durations = []
-        for build in builds:
-            start = build.get('startTime')
-            finish = build.get('finishTime')
-            if start and finish:
-                try:
-                    start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                    finish_dt = datetime.fromisoformat(finish.replace('Z', '+00:00'))
-                    duration = (finish_dt - start_dt).total_seconds()
-                    if duration > 0:
-                        build_durations.append(duration)
-                except Exception:
-                    continue
-        avg_build_duration = round(sum(build_durations) / len(build_durations), 2) if build_durations else None
+        avg_build_duration = round(totals['build_duration_sum_ms'] / totals['build_duration_count'] / 1000, 2) if totals['build_duration_count'] else None
 
         # 4. Başarılı Build Oranı (Son 7 gün)
-        total_builds = len(builds)
-        successful_builds = sum(1 for b in builds if b.get('result', '').lower() == 'succeeded')
-        build_success_rate = (successful_builds / total_builds * 100) if total_builds > 0 else None
+        build_success_rate = (totals['successful_builds'] / pipeline_runs * 100) if pipeline_runs > 0 else None
         # Eksik olan metrik: toplam build sayısı (Son 7 gün)
-        total_build_count_7d = total_builds
+        total_build_count_7d = pipeline_runs
 
         result = {
             "project_name": project_name,
@@ -612,48 +2173,308 @@ def get_project_metrics(project_name):
             "top_committers": top_committers,
             "release_success_rate": release_success_rate,
             "total_build_count_7d": total_build_count_7d,
-            "build_success_rate": build_success_rate
+            "build_success_rate": build_success_rate,
+            "avg_build_duration": avg_build_duration
         }
         # 3. Hem in-memory hem SQLite cache güncelle
-        metrics_cache[cache_key] = {'data': result, 'time': now}
+        set_memory_cache(cache_key, result)
         set_cache(cache_key, json.dumps(result))
         return jsonify(result)
     except Exception as e:
         app.logger.error(f"Error in get_project_metrics for {project_name}: {e}", exc_info=True)
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": str(e)}), 500
 
+# Build duration analytics
+# Durations (start->finish) and queue times (queue->start) of every build in the period are
+# packed into numpy arrays once; percentiles, per-definition breakdowns and histograms are
+# then computed with sorts, bincounts and fancy indexing instead of per-build loops.
+BUILD_STATS_PERCENTILES = (50, 90, 99)
+BUILD_HISTOGRAM_EDGES_SEC = (0, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200)
+
+def grouped_percentiles(groups, values, group_count, percentiles=BUILD_STATS_PERCENTILES):
+    """
+    Linear-interpolated percentiles (same as np.percentile) of `values` per group code in
+    0..group_count-1, as a (group_count, len(percentiles)) float array; NaN for empty groups.
+    """
+    result = np.full((group_count, len(percentiles)), np.nan)
+    if values.size == 0:
+        return result
+    order = np.lexsort((values, groups))
+    sorted_values = values[order].astype(np.float64)
+    counts = np.bincount(groups, minlength=group_count)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = np.flatnonzero(counts)
+    positions = (counts[present, None] - 1) * (np.asarray(percentiles, dtype=np.float64) / 100)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    base = offsets[present, None]
+    low_values = sorted_values[base + lower]
+    high_values = sorted_values[base + upper]
+    result[present] = low_values + (high_values - low_values) * (positions - lower)
+    return result
+
+def summarize_durations(groups, values_ms, group_count):
+    """Per-group {count, mean, max, p50, p90, p99} in seconds, None where a group has no values."""
+    counts = np.bincount(groups, minlength=group_count)
+    sums = np.bincount(groups, weights=values_ms, minlength=group_count)
+    # p100 is the group maximum
+    quantiles = grouped_percentiles(groups, values_ms, group_count, BUILD_STATS_PERCENTILES + (100,))
+    summaries = []
+    for code in range(group_count):
+        if counts[code] == 0:
+            summaries.append(None)
+            continue
+        summary = {"count": int(counts[code]),
+                   "mean": round(sums[code] / counts[code] / 1000, 2),
+                   "max": round(float(quantiles[code][-1]) / 1000, 2)}
+        for p, value in zip(BUILD_STATS_PERCENTILES, quantiles[code]):
+            summary[f"p{p}"] = round(float(value) / 1000, 2)
+        summaries.append(summary)
+    return summaries
+
+def compute_build_stats(builds):
+    """
+    Duration/queue-time statistics for BuildRecords, overall and per pipeline definition.
+    Group 0 of the per-definition arrays is "all builds"; definitions use StringPool codes.
+    """
+    pool = StringPool()
+    definitions = np.fromiter((pool.code(b.definition) for b in builds), dtype=np.int64, count=len(builds))
+    succeeded = np.fromiter((b.result == 'succeeded' for b in builds), dtype=bool, count=len(builds))
+    queue_ms = iso_to_epoch_ms([b.queue_time for b in builds])
+    start_ms = iso_to_epoch_ms([b.start_time for b in builds])
+    finish_ms = iso_to_epoch_ms([b.finish_time for b in builds])
+    # Group code = definition code + 1, so that group 0 can hold every build
+    group_count = len(pool.values) + 1
+    groups = definitions + 1
+
+    def with_overall(mask):
+        # Rows selected by mask, once under their definition's group and once under group 0
+        return np.concatenate((groups[mask], np.zeros(int(np.count_nonzero(mask)), dtype=np.int64)))
+
+    has_duration = (start_ms != EPOCH_MISSING) & (finish_ms != EPOCH_MISSING) & (finish_ms >= start_ms)
+    duration_ms = (finish_ms - start_ms)[has_duration]
+    duration_groups = with_overall(has_duration)
+    duration_values = np.concatenate((duration_ms, duration_ms)).astype(np.float64)
+    has_queue = (queue_ms != EPOCH_MISSING) & (start_ms != EPOCH_MISSING) & (start_ms >= queue_ms)
+    queue_wait_ms = (start_ms - queue_ms)[has_queue]
+    queue_groups = with_overall(has_queue)
+    queue_values = np.concatenate((queue_wait_ms, queue_wait_ms)).astype(np.float64)
+
+    durations = summarize_durations(duration_groups, duration_values, group_count)
+    queues = summarize_durations(queue_groups, queue_values, group_count)
+    edges_ms = np.asarray(BUILD_HISTOGRAM_EDGES_SEC, dtype=np.float64) * 1000
+    bucket_count = len(edges_ms)  # last bucket is ">= last edge"
+    buckets = np.searchsorted(edges_ms, duration_values, side='right') - 1
+    histograms = np.bincount(duration_groups * bucket_count + buckets,
+                             minlength=group_count * bucket_count).reshape(group_count, bucket_count)
+    build_counts = np.bincount(groups, minlength=group_count)
+    build_counts[0] = len(builds)
+    success_counts = np.bincount(groups[succeeded], minlength=group_count)
+    success_counts[0] = int(np.count_nonzero(succeeded))
+
+    def group_stats(code):
+        return {
+            "builds": int(build_counts[code]),
+            "success_rate": round(success_counts[code] / build_counts[code] * 100, 2) if build_counts[code] else None,
+            "duration_sec": durations[code],
+            "queue_sec": queues[code],
+            "histogram": histograms[code].tolist(),
+        }
+
+    by_definition = [
+        {"definition": pool.values[code - 1], **group_stats(code)}
+        for code in np.argsort(-build_counts[1:], kind='stable') + 1 if build_counts[code]
+    ]
+    return {"histogram_edges_sec": list(BUILD_HISTOGRAM_EDGES_SEC), **group_stats(0), "by_definition": by_definition}
+
+@app.route('/api/projects/<project_name>/build-stats', methods=['GET'])
+@with_budget(60)
+def get_project_build_stats(project_name):
+    """
+    Build duration and queue time percentiles (p50/p90/p99), overall and per pipeline
+    definition, with duration histograms. Accepts the same period/start/end as /metrics.
+    """
+    import json
+    from dateutil import parser as dtparser
+    cache_key = f"build-stats-{project_name}:{get_period_cache_suffix()}"
+    cached = get_memory_cache(cache_key, metrics_cache_expiry)
+    if cached is not None:
+        app.logger.info(f'[CACHE] Returning in-memory cached build stats for {cache_key}')
+        return jsonify(cached['data'])
+    cache_data, cache_time = get_cache(cache_key)
+    if cache_data and (datetime.utcnow() - dtparser.parse(cache_time)).total_seconds() < metrics_cache_expiry:
+        app.logger.info(f'[CACHE] Returning SQLite cached build stats for {cache_key}')
+        set_memory_cache(cache_key, json.loads(cache_data))
+        return jsonify(json.loads(cache_data))
+    try:
+        first_day, last_day, days = get_period_days()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        builds = get_builds_for_project(project_name, day_start(first_day).isoformat() + "Z",
+                                        day_start(last_day + 1).isoformat() + "Z")
+        started = time.perf_counter()
+        stats = compute_build_stats(builds)
+        app.logger.info(f"[BUILD-STATS] {project_name}: {len(builds)} builds aggregated in {(time.perf_counter() - started) * 1000:.1f} ms")
+        result = {"project_name": project_name, "days": days, **stats}
+        set_memory_cache(cache_key, result)
+        set_cache(cache_key, json.dumps(result))
+        return jsonify(result)
+    except Exception as e:
+        app.logger.error(f"Error in get_project_build_stats for {project_name}: {e}", exc_info=True)
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
+        return jsonify({"error": str(e)}), 500
+
+def get_dora_engine_info(project_name=None):
+    """History start and open production incident of one project, or the engine's project list."""
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        if project_name is None:
+            c.execute('SELECT project FROM dora_state ORDER BY project')
+            return {"projects": org_unscoped([row[0] for row in c.fetchall()])}
+        c.execute('SELECT first_day, open_failure_ms FROM dora_state WHERE project=?', (org_scoped(project_name),))
+        row = c.fetchone()
+    if row is None:
+        return {"history_start": None, "failing_since": None}
+    first_day, open_failure_ms = row
+    return {
+        "history_start": day_start(first_day).strftime('%Y-%m-%d'),
+        "failing_since": (EPOCH + timedelta(milliseconds=open_failure_ms)).isoformat() + "Z" if open_failure_ms is not None else None,
+    }
+
+@app.route('/api/projects/<project_name>/dora', methods=['GET'])
+@with_budget(60)
+def get_project_dora(project_name):
+    """
+    DORA metrics of a project (production deployments). Accepts period/start/end like
+    /metrics, default 30d. Only days not yet seen by the engine hit Azure DevOps.
+    """
+    try:
+        first_day, last_day, days = get_period_days('30d')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    errors = []
+    try:
+        sync_project_rollups(project_name, first_day)
+    except Exception as e:
+        # Answer from what the engine has already seen
+        app.logger.error(f"[DORA] Could not sync {project_name}: {e}")
+        errors.append({"error": upstream_error_message(e)})
+    result = {"project_name": project_name, **query_dora_metrics(project_name, first_day, last_day),
+              **get_dora_engine_info(project_name)}
+    return partial_response(result, errors)
+
+@app.route('/api/dora', methods=['GET'])
+def get_org_dora():
+    """Org-wide DORA metrics over every project the engine has seen so far (no upstream calls)."""
+    try:
+        first_day, last_day, days = get_period_days('30d')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({**query_dora_metrics(DORA_ORG, first_day, last_day), **get_dora_engine_info()})
+
+LEADERBOARD_MAX_K = 100
+
+def leaderboard_response(project_name=None):
+    try:
+        first_day, last_day, days = get_period_days('30d')
+        k = min(max(int(request.args.get('k', 10)), 1), LEADERBOARD_MAX_K)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    result = {"days": days, **query_leaderboard(first_day, last_day, k, project_name)}
+    if project_name is not None:
+        result = {"project_name": project_name, **result}
+    return jsonify(result)
+
+@app.route('/api/projects/<project_name>/leaderboard', methods=['GET'])
+def get_project_leaderboard(project_name):
+    """
+    Committer leaderboard of a project from the stored per-author, per-day counters (no
+    upstream calls). period/start/end like /metrics, default 30d; ?k= entries (max 100).
+    """
+    return leaderboard_response(project_name)
+
+@app.route('/api/leaderboard', methods=['GET'])
+def get_org_leaderboard():
+    """Org-wide committer leaderboard over every synced project of the organization."""
+    return leaderboard_response()
+
+RECENT_COMMITS_CACHE_SEC = 60
+RECENT_COMMITS_MAX_LIMIT = 100
+
+def commit_author_date(commit):
+    return (commit.get('author') or {}).get('date') or ''
+
+def fetch_repo_recent_commits(organization, project_name, repo, start_date, end_date, limit, deadline):
+    """The newest `limit` commits of one repo, newest first (runs on upstream_executor)."""
+    commits = get_commits_data(organization, project_name, repo['id'], start_date, end_date,
+                               repository_name=repo.get('name'), top=limit, deadline=deadline)
+    commits.sort(key=commit_author_date, reverse=True)
+    return commits
+
 @app.route('/api/projects/<project_name>/recent-commits', methods=['GET'])
+@with_budget(15)
 def get_project_recent_commits(project_name):
     app.logger.info(f"Fetching recent commits for project: {project_name}")
     try:
-        organization_name = get_devops_org_url().split('/')[-1]
-        repos = get_repos_data(project_name)
-        all_commits = []
+        limit = min(max(int(request.args.get('limit', 10)), 1), RECENT_COMMITS_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    cache_key = f"recent-commits-{project_name}:{limit}"
+    cached = get_memory_cache(cache_key, RECENT_COMMITS_CACHE_SEC)
+    if cached is not None:
+        app.logger.info(f'[CACHE] Returning in-memory cached recent commits for {cache_key}')
+        return jsonify(cached['data'])
+    try:
+        import json
+        organization_name = get_devops_org_name()
+        repos = [repo for repo in get_repos_cached(project_name) if repo.get('id')]
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=7)
         start_date_str = start_date.isoformat() + "Z"
         end_date_str = end_date.isoformat() + "Z"
-        for repo in repos:
+        deadline = g.get('deadline')
+        futures = [
+            (repo, submit_upstream(fetch_repo_recent_commits, organization_name, project_name, repo,
+                                            start_date_str, end_date_str, limit, deadline))
+            for repo in repos
+        ]
+        per_repo = []
+        errors = []
+        for repo, future in futures:
             repo_id = repo.get('id')
             repo_name = repo.get('name')
-            if repo_id:
-                try:
-                    commits = get_commits_data(organization_name, project_name, repo_id, start_date_str, end_date_str, repository_name=repo_name)
-                    all_commits.extend(commits)
-                except requests.exceptions.HTTPError as e:
-                    app.logger.error(f"Failed to fetch commits for repo {repo_name} ({repo_id}): {e}")
-                    if e.response is not None and e.response.status_code == 404:
-                        app.logger.info(f"Repo {repo_name} might be empty or recently created.")
-                except Exception as e:
-                    app.logger.error(f"An unexpected error occurred fetching commits for repo {repo_name} ({repo_id}): {e}")
-        all_commits.sort(key=lambda c: c.get('author', {}).get('date'), reverse=True)
-        limit = int(request.args.get('limit', 10))
-        return jsonify(all_commits[:limit])
+            try:
+                per_repo.append(future.result())
+            except requests.exceptions.HTTPError as e:
+                app.logger.error(f"Failed to fetch commits for repo {repo_name} ({repo_id}): {e}")
+                if e.response is not None and e.response.status_code == 404:
+                    app.logger.info(f"Repo {repo_name} might be empty or recently created.")
+                else:
+                    errors.append({"repository": repo_name, "error": upstream_error_message(e)})
+            except Exception as e:
+                app.logger.error(f"An unexpected error occurred fetching commits for repo {repo_name} ({repo_id}): {e}")
+                errors.append({"repository": repo_name, "error": upstream_error_message(e)})
+        # k-way merge of the per-repo newest-first lists; only the first `limit` items are consumed
+        merged = heapq.merge(*per_repo, key=commit_author_date, reverse=True)
+        recent_commits = list(islice(merged, limit))
+        if not errors:
+            set_memory_cache(cache_key, recent_commits, ttl=RECENT_COMMITS_CACHE_SEC)
+            set_cache(cache_key, json.dumps(recent_commits))
+        return partial_response(recent_commits, errors)
     except ValueError as e:
         app.logger.error(f"Configuration error for recent commits: {e}")
         return jsonify({"error": str(e)}), 500
     except requests.exceptions.RequestException as e:
         app.logger.error(f"Azure DevOps API request error for recent commits: {e}")
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         error_detail = str(e)
         if hasattr(e, 'response') and e.response is not None:
             try:
@@ -665,13 +2486,81 @@ def get_project_recent_commits(project_name):
         app.logger.error(f"Unexpected error fetching recent commits: {e}", exc_info=True)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
+DEVOPS_INFO_CACHE_KEY = 'devops-info-v1'
+DEVOPS_INFO_MAX_AGE_SEC = 3600  # 1 saatten eskiyse güncelle
+
+def fetch_devops_inventory():
+    """Projects with their repository, build pipeline and release pipeline names (Azure DevOps SDK)."""
+    from msrest.authentication import BasicAuthentication
+    from azure.devops.connection import Connection
+    config = get_org_config()
+    credentials = BasicAuthentication('', config.pat)
+    connection = Connection(base_url=config.url, creds=credentials)
+    app.logger.info("Successfully created Azure DevOps connection object.")
+
+    core_client = connection.clients.get_core_client()
+    git_client = connection.clients.get_git_client()
+    release_client = connection.clients.get_release_client()
+    build_client = connection.clients.get_build_client()
+    app.logger.info("Successfully obtained Azure DevOps API clients.")
+    # SDK calls bypass azure_get, so bound each of them by the per-call upstream timeout
+    for client in (core_client, git_client, release_client, build_client):
+        client.config.connection.timeout = UPSTREAM_TIMEOUT_SEC
+
+    projects = core_client.get_projects()
+    app.logger.info(f"Successfully fetched {len(projects)} projects.")
+    
+    projects_data = []
+    for project in projects:
+        remaining = remaining_budget()
+        if remaining is not None and remaining <= 0:
+            # An incomplete inventory must not be cached; fall back to the last full one
+            raise DeadlineExceeded(f"Latency budget exhausted after {len(projects_data)} of {len(projects)} projects")
+        app.logger.info(f"Processing project: {project.name} (ID: {project.id})")
+        project_info = {
+            "project_id": project.id,
+            "project_name": project.name,
+            "repositories": [],
+            "build_pipelines": [],
+            "release_pipelines": []
+        }
+
+        try:
+            repos = git_client.get_repositories(project=project.id)
+            project_info["repositories"] = [repo.name for repo in repos]
+            app.logger.info(f"Fetched {len(project_info['repositories'])} repositories for project '{project.name}'.")
+        except Exception as e_repo:
+            app.logger.error(f"Error fetching repositories for project '{project.name}': {str(e_repo)}")
+            project_info["repositories"].append(f"Error fetching repositories: {str(e_repo)}")
+
+        try:
+            build_definitions = build_client.get_definitions(project=project.id)
+            project_info["build_pipelines"] = [definition.name for definition in build_definitions]
+            app.logger.info(f"Fetched {len(project_info['build_pipelines'])} build pipelines for project '{project.name}'.")
+        except Exception as e_build:
+            app.logger.error(f"Error fetching build pipelines for project '{project.name}': {str(e_build)}")
+            project_info["build_pipelines"].append(f"Error fetching build pipelines: {str(e_build)}")
+
+        try:
+            release_definitions = release_client.get_release_definitions(project=project.id)
+            project_info["release_pipelines"] = [definition.name for definition in release_definitions]
+            app.logger.info(f"Fetched {len(project_info['release_pipelines'])} release pipelines for project '{project.name}'.")
+        except Exception as e_release:
+            app.logger.error(f"Error fetching release pipelines for project '{project.name}': {str(e_release)}")
+            project_info["release_pipelines"].append(f"Error fetching release pipelines: {str(e_release)}")
+        
+        projects_data.append(project_info)
+    
+    app.logger.info("Successfully processed all projects and their details.")
+    return projects_data
+
 @app.route('/api/devops-info', methods=['GET'])
+@with_budget(120)
 def get_devops_info():
     app.logger.info("Endpoint /api/devops-info called.")
-    cache_key = 'devops-info-v1'
+    cache_key = DEVOPS_INFO_CACHE_KEY
     cache_data, cache_time = get_cache(cache_key)
-    # 1 saatten eskiyse güncelle
-    max_age_sec = 3600
+    max_age_sec = DEVOPS_INFO_MAX_AGE_SEC
     if cache_data:
         from datetime import datetime, timedelta
         from dateutil import parser as dtparser
@@ -682,74 +2571,214 @@ def get_devops_info():
             return jsonify(json.loads(cache_data))
 
     # Cache yoksa veya eskiyse canlı çek
-    if not AZURE_DEVOPS_ORG_URL or not AZURE_DEVOPS_PAT:
+    try:
+        config = get_org_config()
+    except ValueError:
+        config = None
+    if config is None or not config.pat:
         app.logger.error("AZURE_DEVOPS_ORG_URL or AZURE_DEVOPS_PAT is not set in environment variables.")
         return jsonify({"error": "Azure DevOps Organization URL or Personal Access Token is not configured on the server."}), 500
 
-    app.logger.info(f"Attempting to connect to Azure DevOps. Org URL starts with: {AZURE_DEVOPS_ORG_URL[:30] if AZURE_DEVOPS_ORG_URL else 'N/A'}")
-    app.logger.info(f"PAT is {'set' if AZURE_DEVOPS_PAT else 'NOT SET'}.")
+    app.logger.info(f"Attempting to connect to Azure DevOps. Org URL starts with: {config.url[:30]}")
+    app.logger.info(f"PAT is {'set' if config.pat else 'NOT SET'}.")
 
     try:
-        credentials = BasicAuthentication('', AZURE_DEVOPS_PAT)
-        connection = Connection(base_url=AZURE_DEVOPS_ORG_URL, creds=credentials)
-        app.logger.info("Successfully created Azure DevOps connection object.")
-
-        core_client = connection.clients.get_core_client()
-        git_client = connection.clients.get_git_client()
-        release_client = connection.clients.get_release_client()
-        build_client = connection.clients.get_build_client()
-        app.logger.info("Successfully obtained Azure DevOps API clients.")
-
-        projects = core_client.get_projects()
-        app.logger.info(f"Successfully fetched {len(projects)} projects.")
-        
-        projects_data = []
-        for project in projects:
-            app.logger.info(f"Processing project: {project.name} (ID: {project.id})")
-            project_info = {
-                "project_id": project.id,
-                "project_name": project.name,
-                "repositories": [],
-                "build_pipelines": [],
-                "release_pipelines": []
-            }
-
-            try:
-                repos = git_client.get_repositories(project=project.id)
-                project_info["repositories"] = [repo.name for repo in repos]
-                app.logger.info(f"Fetched {len(project_info['repositories'])} repositories for project '{project.name}'.")
-            except Exception as e_repo:
-                app.logger.error(f"Error fetching repositories for project '{project.name}': {str(e_repo)}")
-                project_info["repositories"].append(f"Error fetching repositories: {str(e_repo)}")
-
-            try:
-                build_definitions = build_client.get_definitions(project=project.id)
-                project_info["build_pipelines"] = [definition.name for definition in build_definitions]
-                app.logger.info(f"Fetched {len(project_info['build_pipelines'])} build pipelines for project '{project.name}'.")
-            except Exception as e_build:
-                app.logger.error(f"Error fetching build pipelines for project '{project.name}': {str(e_build)}")
-                project_info["build_pipelines"].append(f"Error fetching build pipelines: {str(e_build)}")
-
-            try:
-                release_definitions = release_client.get_release_definitions(project=project.id)
-                project_info["release_pipelines"] = [definition.name for definition in release_definitions]
-                app.logger.info(f"Fetched {len(project_info['release_pipelines'])} release pipelines for project '{project.name}'.")
-            except Exception as e_release:
-                app.logger.error(f"Error fetching release pipelines for project '{project.name}': {str(e_release)}")
-                project_info["release_pipelines"].append(f"Error fetching release pipelines: {str(e_release)}")
-            
-            projects_data.append(project_info)
-        
-        app.logger.info("Successfully processed all projects and their details.")
+        projects_data = fetch_devops_inventory()
         import json
         set_cache(cache_key, json.dumps(projects_data))
         return jsonify(projects_data)
 
     except Exception as e:
         app.logger.error(f"A general error occurred in /api/devops-info: {str(e)}", exc_info=True)
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": f"An error occurred while communicating with Azure DevOps API. Check server logs for details. Error type: {type(e).__name__}"}), 500
 
+# Inventory search
+# Every project, repository and pipeline name of the devops-info inventory is tokenized
+# (separators and camelCase boundaries) into a sorted term list with posting sets. A query
+# token matches every term it is a prefix of, found with two bisects, so lookups cost
+# O(log terms + matches) instead of a scan over the whole inventory.
+SEARCH_KINDS = ('project', 'repository', 'build_pipeline', 'release_pipeline')
+SEARCH_KIND_BOOST = {'project': 3, 'repository': 2, 'build_pipeline': 1, 'release_pipeline': 1}
+SEARCH_MAX_PAGE_SIZE = 100
+
+def search_tokens(text):
+    """Lowercased words of a name, split on separators, letter/digit and camelCase boundaries."""
+    import re
+    tokens = []
+    for word in re.findall(r'[^\W\d_]+|\d+', text):
+        start = 0
+        for i in range(1, len(word)):
+            # fooBar -> foo|Bar, HTTPServer -> HTTP|Server (works for non-ASCII letters too)
+            if word[i].isupper() and (word[i - 1].islower() or (i + 1 < len(word) and word[i + 1].islower() and word[i - 1].isupper())):
+                tokens.append(word[start:i].lower())
+                start = i
+        tokens.append(word[start:].lower())
+    return tokens
+
+class SearchIndex:
+    """Prefix index over inventory names; built once per inventory refresh, read-only afterwards."""
+
+    def __init__(self, inventory):
+        import bisect
+        self._bisect = bisect
+        self.docs = []  # (kind, name, project, lowercased name)
+        postings = {}
+        for project in inventory:
+            project_name = project.get('project_name')
+            entries = [('project', project_name)]
+            for kind, field in (('repository', 'repositories'), ('build_pipeline', 'build_pipelines'),
+                                ('release_pipeline', 'release_pipelines')):
+                entries.extend((kind, name) for name in project.get(field) or []
+                               if name and not name.startswith('Error fetching '))
+            for kind, name in entries:
+                if not name:
+                    continue
+                doc_id = len(self.docs)
+                self.docs.append((kind, name, project_name, name.lower()))
+                for term in set(search_tokens(name)) | {name.lower()}:
+                    postings.setdefault(term, set()).add(doc_id)
+        self.terms = sorted(postings)
+        self.postings = [postings[term] for term in self.terms]
+
+    def __len__(self):
+        return len(self.docs)
+
+    def prefix_matches(self, prefix):
+        """{doc_id: True if some term equals prefix, else False} for terms starting with prefix."""
+        lo = self._bisect.bisect_left(self.terms, prefix)
+        hi = self._bisect.bisect_left(self.terms, prefix + '\uffff')
+        matches = {}
+        for i in range(lo, hi):
+            exact = self.terms[i] == prefix
+            for doc_id in self.postings[i]:
+                matches[doc_id] = matches.get(doc_id, False) or exact
+        return matches
+
+    def score(self, doc_id, query, exact_tokens):
+        kind, name, _, lowered = self.docs[doc_id]
+        score = 10 * exact_tokens + SEARCH_KIND_BOOST[kind]
+        if lowered == query:
+            score += 100
+        elif lowered.startswith(query):
+            score += 50
+        elif query in lowered:
+            score += 20
+        return score
+
+    def search(self, query, kinds=None, offset=0, limit=20):
+        """Returns (total, [(score, doc)]) for docs matching every query token by prefix."""
+        query = ' '.join(query.lower().split())
+        tokens = search_tokens(query) or ([query] if query else [])
+        if not tokens:
+            return 0, []
+        candidates = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            matches = self.prefix_matches(token)
+            if candidates is None:
+                candidates = {doc_id: int(exact) for doc_id, exact in matches.items()}
+            else:
+                candidates = {doc_id: hits + int(matches[doc_id]) for doc_id, hits in candidates.items() if doc_id in matches}
+            if not candidates:
+                return 0, []
+        if kinds:
+            candidates = {doc_id: hits for doc_id, hits in candidates.items() if self.docs[doc_id][0] in kinds}
+        # Best first; shorter names first among equal scores, then alphabetically
+        ranked = heapq.nsmallest(
+            offset + limit,
+            ((-self.score(doc_id, query, hits), len(self.docs[doc_id][1]), self.docs[doc_id][3], doc_id)
+             for doc_id, hits in candidates.items()),
+        )
+        return len(candidates), [(-neg_score, self.docs[doc_id]) for neg_score, _, _, doc_id in ranked[offset:]]
+
+search_index_states = {}  # org name -> {'inventory_time', 'index'}
+search_index_lock = Lock()
+
+inventory_refreshes = set()  # organizations with a background inventory refresh running
+inventory_refreshes_lock = Lock()
+
+def refresh_inventory_in_background():
+    """Starts a devops-info refresh for the current organization unless one is already running."""
+    import json
+    org_name = get_devops_org_name()
+    with inventory_refreshes_lock:
+        if org_name in inventory_refreshes:
+            return
+        inventory_refreshes.add(org_name)
+
+    def refresh():
+        try:
+            set_cache(DEVOPS_INFO_CACHE_KEY, json.dumps(fetch_devops_inventory()))
+            app.logger.info(f"[SEARCH] Inventory of {org_name} refreshed in the background")
+        except Exception as e:
+            app.logger.error(f"[SEARCH] Background inventory refresh of {org_name} failed: {e}")
+        finally:
+            with inventory_refreshes_lock:
+                inventory_refreshes.discard(org_name)
+
+    Thread(target=contextvars.copy_context().run, args=(refresh,), name=f'inventory-refresh-{org_name}', daemon=True).start()
+
+def get_search_index():
+    """
+    SearchIndex of the devops-info inventory, rebuilt only when the cached inventory changes.
+    A missing or expired inventory is refreshed in the background while searches keep using
+    the previous index; returns None until a first inventory exists.
+    """
+    import json
+    from dateutil import parser as dtparser
+    cache_time = get_cache_updated_at(DEVOPS_INFO_CACHE_KEY)
+    if not cache_time or (datetime.utcnow() - dtparser.parse(cache_time)).total_seconds() >= DEVOPS_INFO_MAX_AGE_SEC:
+        refresh_inventory_in_background()
+    inventory_time = get_cache_updated_at(DEVOPS_INFO_CACHE_KEY, real_updated_at=True)
+    with search_index_lock:
+        search_index_state = search_index_states.setdefault(get_devops_org_name(), {'inventory_time': None, 'index': None})
+        if inventory_time and search_index_state['inventory_time'] != inventory_time:
+            started = time.perf_counter()
+            cache_data, inventory_time = get_cache(DEVOPS_INFO_CACHE_KEY, real_updated_at=True)
+            search_index_state['index'] = SearchIndex(json.loads(cache_data))
+            search_index_state['inventory_time'] = inventory_time
+            app.logger.info(f"[SEARCH] Indexed {len(search_index_state['index'])} names in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return search_index_state['index']
+
+@app.route('/api/search', methods=['GET'])
+def search_inventory():
+    """
+    Ranked search over project, repository and pipeline names.
+    ?q= (required), ?type= (comma-separated kinds), ?page= (1-based), ?page_size= (max 100).
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    kinds = [kind for kind in (request.args.get('type') or '').split(',') if kind]
+    if any(kind not in SEARCH_KINDS for kind in kinds):
+        return jsonify({"error": f"type must be one of {', '.join(SEARCH_KINDS)}"}), 400
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        page_size = min(max(int(request.args.get('page_size', 20)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "page and page_size must be integers"}), 400
+    try:
+        index = get_search_index()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
+    if index is None:
+        response = jsonify({"error": "Inventory is not available yet; it is being loaded, retry shortly."})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    total, hits = index.search(query, kinds=set(kinds), offset=(page - 1) * page_size, limit=page_size)
+    return jsonify({
+        "query": query,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "results": [{"type": kind, "name": name, "project": project, "score": score}
+                    for score, (kind, name, project, _) in hits],
+    })
+
 @app.route('/api/projects/<project_name>/repos', methods=['GET'])
+@with_budget(15)
 def get_project_repos(project_name):
     """
     Returns repositories for a given project, with SQLite caching (10dk).
@@ -757,7 +2786,7 @@ def get_project_repos(project_name):
     import json
     cache_key = f"repos-{project_name}"
     cache_data, cache_time = get_cache(cache_key)
-    max_age_sec = 600  # 10 dakika
+    max_age_sec = REPOS_CACHE_SEC
     from datetime import datetime
     from dateutil import parser as dtparser
     if cache_data:
@@ -771,9 +2800,13 @@ def get_project_repos(project_name):
         return jsonify(repos)
     except Exception as e:
         app.logger.error(f"Error fetching repos for {project_name}: {e}")
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/projects/<project_name>/pipelines', methods=['GET'])
+@with_budget(15)
 def get_project_pipelines(project_name):
     """
     Returns pipelines for a given project, with SQLite caching (10dk).
@@ -795,9 +2828,13 @@ def get_project_pipelines(project_name):
         return jsonify(pipelines)
     except Exception as e:
         app.logger.error(f"Error fetching pipelines for {project_name}: {e}")
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/projects/<project_name>/releases', methods=['GET'])
+@with_budget(15)
 def get_project_releases(project_name):
     """
     Returns release definitions for a given project, with SQLite caching (10dk).
@@ -819,183 +2856,667 @@ def get_project_releases(project_name):
         return jsonify(releases)
     except Exception as e:
         app.logger.error(f"Error fetching releases for {project_name}: {e}")
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": str(e)}), 500
 
+TEAMS_CACHE_SEC = 600  # 10 dakika
+
+def get_teams_data(project_name, deadline=None):
+    # Azure DevOps REST API: https://dev.azure.com/{org}/{project}/_apis/teams?api-version=7.1-preview.3
+    org_url = get_devops_org_url()
+    api_version = '7.1-preview.3'
+    url = f"{org_url}/{project_name}/_apis/teams?api-version={api_version}"
+    response = azure_get(url, headers=get_headers(), deadline=deadline)
+    response.raise_for_status()
+    return response.json().get('value', [])
+
+def get_team_members_data(project_name, team_id, deadline=None):
+    org_url = get_devops_org_url()
+    api_version = '7.1-preview.1'
+    url = f"{org_url}/{project_name}/_apis/teams/{team_id}/members?api-version={api_version}"
+    response = azure_get(url, headers=get_headers(), deadline=deadline)
+    response.raise_for_status()
+    return response.json().get('value', [])
+
+def get_fresh_cache(cache_key, max_age_sec):
+    """Parsed SQLite cache value if younger than max_age_sec, else None."""
+    import json
+    from dateutil import parser as dtparser
+    cache_data, cache_time = get_cache(cache_key)
+    if cache_data and (datetime.utcnow() - dtparser.parse(cache_time)).total_seconds() < max_age_sec:
+        return json.loads(cache_data)
+    return None
+
+def get_team_members_cached(project_name, team_id, deadline=None):
+    """Members of one team through the team-members-<project>-<team> entry (runs on upstream_executor)."""
+    import json
+    cache_key = f"team-members-{project_name}-{team_id}"
+    members = get_fresh_cache(cache_key, TEAMS_CACHE_SEC)
+    if members is None:
+        members = get_team_members_data(project_name, team_id, deadline=deadline)
+        set_cache(cache_key, json.dumps(members))
+    return members
+
+def expand_team_members(project_name, teams):
+    """
+    Fetches every team's members concurrently and moves identities into a shared table:
+    {"teams": [{..., "members": [{"id", "isTeamAdmin"}]}], "identities": {id: identity}}.
+    Returns (result, errors); teams whose members could not be loaded get "members": None.
+    """
+    deadline = g.get('deadline')
+    futures = [
+        (team, submit_upstream(get_team_members_cached, project_name, team.get('id'), deadline))
+        for team in teams
+    ]
+    identities = {}
+    expanded = []
+    errors = []
+    for team, future in futures:
+        try:
+            members = future.result()
+        except Exception as e:
+            app.logger.error(f"Error fetching team members for {project_name}/{team.get('id')}: {e}")
+            errors.append({"team": team.get('name'), "error": upstream_error_message(e)})
+            expanded.append({**team, "members": None})
+            continue
+        refs = []
+        for member in members:
+            identity = member.get('identity') or {}
+            identity_id = identity.get('id')
+            if not identity_id:
+                continue
+            identities.setdefault(identity_id, identity)
+            refs.append({"id": identity_id, "isTeamAdmin": bool(member.get('isTeamAdmin'))})
+        expanded.append({**team, "members": refs})
+    return {"teams": expanded, "identities": identities}, errors
+
 @app.route('/api/projects/<project_name>/teams', methods=['GET'])
+@with_budget(15)
 def get_project_teams(project_name):
     """
     Returns teams for a given project, with SQLite caching (10dk).
+    ?expand=members also returns every team's members, with identities deduplicated.
     """
     import json
     cache_key = f"teams-{project_name}"
-    cache_data, cache_time = get_cache(cache_key)
-    max_age_sec = 600  # 10 dakika
-    from datetime import datetime
-    from dateutil import parser as dtparser
-    if cache_data:
-        cache_dt = dtparser.parse(cache_time)
-        if (datetime.utcnow() - cache_dt).total_seconds() < max_age_sec:
-            app.logger.info(f"Returning cached teams for {project_name} (age: {(datetime.utcnow() - cache_dt).total_seconds()}s)")
-            return jsonify(json.loads(cache_data))
-    try:
-        # Azure DevOps REST API: https://dev.azure.com/{org}/{project}/_apis/teams?api-version=7.1-preview.3
-        org_url = get_devops_org_url()
-        api_version = '7.1-preview.3'
-        url = f"{org_url}/{project_name}/_apis/teams?api-version={api_version}"
-        response = requests.get(url, headers=get_headers())
-        response.raise_for_status()
-        teams = response.json().get('value', [])
-        set_cache(cache_key, json.dumps(teams))
+    expand_members = request.args.get('expand') == 'members'
+    teams = get_fresh_cache(cache_key, TEAMS_CACHE_SEC)
+    teams_errors = []
+    if teams is not None:
+        app.logger.info(f"Returning cached teams for {project_name}")
+    else:
+        try:
+            teams = get_teams_data(project_name)
+            set_cache(cache_key, json.dumps(teams))
+        except Exception as e:
+            app.logger.error(f"Error fetching teams for {project_name}: {e}")
+            if not expand_members:
+                stale = stale_response(cache_key, e)
+                if stale is not None:
+                    return stale
+                return jsonify({"error": str(e)}), 500
+            # Expand from the last known team list, reported as a partial result
+            cache_data, _ = get_cache(cache_key)
+            if not cache_data:
+                return jsonify({"error": str(e)}), 500
+            teams = json.loads(cache_data)
+            teams_errors.append({"team": None, "error": upstream_error_message(e)})
+    if not expand_members:
         return jsonify(teams)
-    except Exception as e:
-        app.logger.error(f"Error fetching teams for {project_name}: {e}")
-        return jsonify({"error": str(e)}), 500
+    result, errors = expand_team_members(project_name, teams)
+    return partial_response(result, teams_errors + errors)
 
 @app.route('/api/projects/<project_name>/teams/<team_id>/members', methods=['GET'])
+@with_budget(15)
 def get_team_members(project_name, team_id):
     """
     Returns members for a given team in a project, with SQLite caching (10dk).
     """
-    import json
     cache_key = f"team-members-{project_name}-{team_id}"
-    cache_data, cache_time = get_cache(cache_key)
-    max_age_sec = 600  # 10 dakika
-    from datetime import datetime
-    from dateutil import parser as dtparser
-    if cache_data:
-        cache_dt = dtparser.parse(cache_time)
-        if (datetime.utcnow() - cache_dt).total_seconds() < max_age_sec:
-            app.logger.info(f"Returning cached team members for {project_name}/{team_id} (age: {(datetime.utcnow() - cache_dt).total_seconds()}s)")
-            return jsonify(json.loads(cache_data))
     try:
-        org_url = get_devops_org_url()
-        api_version = '7.1-preview.1'
-        url = f"{org_url}/{project_name}/_apis/teams/{team_id}/members?api-version={api_version}"
-        response = requests.get(url, headers=get_headers())
-        response.raise_for_status()
-        members = response.json().get('value', [])
-        set_cache(cache_key, json.dumps(members))
-        return jsonify(members)
+        return jsonify(get_team_members_cached(project_name, team_id))
     except Exception as e:
         app.logger.error(f"Error fetching team members for {project_name}/{team_id}: {e}")
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": str(e)}), 500
 
+def get_project_environment_counts(organization_name, project_name, start_date_iso, end_date_iso):
+    deployments = get_all_deployments_for_project(organization_name, project_name, start_date_iso, end_date_iso)
+    events = EventTable.from_events(deployments=deployments)
+    env_counts = bucket_environment_counts(events.value_counts(EVENT_DEPLOYMENT, 'environment'))
+    return {
+        'project': project_name,
+        'Test': env_counts.get('Test', 0),
+        'Staging': env_counts.get('Staging', 0),
+        'Production': env_counts.get('Production', 0)
+    }
+
+def get_project_environment_row(organization_name, project_name, start_date_iso, end_date_iso):
+    """
+    Environment counts row for one project. If Azure DevOps fails, the project's last cached
+    deployments-env counts are used (row marked stale) or, failing that, null counts with the
+    error. Returns (row, error) where error is None on success.
+    """
+    import json
+    from dateutil import parser as dtparser
+    try:
+        return get_project_environment_counts(organization_name, project_name, start_date_iso, end_date_iso), None
+    except requests.exceptions.RequestException as e:
+        app.logger.error(f"Deployments by environment failed for project {project_name}: {e}")
+        row = {'project': project_name, 'Test': None, 'Staging': None, 'Production': None, 'error': upstream_error_message(e)}
+        cache_data, cache_time = get_cache(f"deployments-env-{project_name}")
+        if cache_data:
+            cached = json.loads(cache_data)
+            row.update({env_name: cached.get(env_name, 0) for env_name in ('Test', 'Staging', 'Production')})
+            row['stale'] = True
+            row['stale_age_sec'] = int((datetime.utcnow() - dtparser.parse(cache_time)).total_seconds())
+        return row, row['error']
+
+# Last complete org-wide result, served (marked stale) when the project list cannot be fetched
+DEPLOYMENTS_BY_ENVIRONMENT_CACHE_KEY = 'deployments-by-environment'
+
+def get_environment_window():
+    now_utc = datetime.utcnow()
+    start_utc = now_utc - timedelta(days=30)
+    return start_utc.isoformat() + "Z", now_utc.isoformat() + "Z"
+
 @app.route('/api/deployments-by-environment', methods=['GET'])
+@with_budget(90)
 def deployments_by_environment():
     """
     Returns monthly deployment counts by environment (Test, Staging, Production) for each project.
     """
-    from collections import defaultdict
-    import json
     try:
-        org_url_full = get_devops_org_url()
-        organization_name = org_url_full.split('/')[-1]
+        organization_name = get_devops_org_name()
         projects = get_projects_data()
-        now_utc = datetime.utcnow()
-        start_utc = now_utc - timedelta(days=30)
-        start_date_iso = start_utc.isoformat() + "Z"
-        end_date_iso = now_utc.isoformat() + "Z"
+        start_date_iso, end_date_iso = get_environment_window()
         result = []
+        errors = []
         for project in projects:
             project_name = project.get('name')
             if not project_name:
                 continue
-            deployments = get_all_deployments_for_project(organization_name, project_name, start_date_iso, end_date_iso)
-            env_counts = defaultdict(int)
-            for dep in deployments:
-                env_name = None
-                # Try to get environment name from deployment
-                if dep.get('releaseEnvironment', {}).get('name'):
-                    env_name = dep['releaseEnvironment']['name']
-                elif dep.get('release', {}).get('environmentName'):
-                    env_name = dep['release']['environmentName']
-                # Normalize environment name
-                if env_name:
-                    env_lower = env_name.lower()
-                    if 'test' in env_lower:
-                        env_counts['Test'] += 1
-                    elif 'stag' in env_lower:
-                        env_counts['Staging'] += 1
-                    elif 'prod' in env_lower:
-                        env_counts['Production'] += 1
-                    else:
-                        env_counts[env_name] += 1
-                else:
-                    env_counts['Unknown'] += 1
-            result.append({
-                'project': project_name,
-                'Test': env_counts.get('Test', 0),
-                'Staging': env_counts.get('Staging', 0),
-                'Production': env_counts.get('Production', 0)
-            })
-        return jsonify(result)
+            row, error = get_project_environment_row(organization_name, project_name, start_date_iso, end_date_iso)
+            result.append(row)
+            if error:
+                errors.append({"project": project_name, "error": error})
+        if not errors:
+            import json
+            set_cache(DEPLOYMENTS_BY_ENVIRONMENT_CACHE_KEY, json.dumps(result))
+        return partial_response(result, errors)
     except Exception as e:
         app.logger.error(f"Error in deployments_by_environment: {e}", exc_info=True)
+        stale = stale_response(DEPLOYMENTS_BY_ENVIRONMENT_CACHE_KEY, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/deployments-by-environment/stream', methods=['GET'])
+@with_budget(600)
+def deployments_by_environment_stream():
+    """
+    Server-Sent Events variant of /api/deployments-by-environment. Emits a `project` event with
+    the project's row and running Test/Staging/Production totals, then `done` whose `result`
+    equals the non-streaming response. Closing the connection stops the upstream work.
+    """
+    def generate():
+        result = []
+        try:
+            organization_name = get_devops_org_name()
+            projects = [p for p in get_projects_data() if p.get('name')]
+            start_date_iso, end_date_iso = get_environment_window()
+            totals = {'Test': 0, 'Staging': 0, 'Production': 0}
+            errors = []
+            for project in projects:
+                row, error = get_project_environment_row(organization_name, project['name'], start_date_iso, end_date_iso)
+                result.append(row)
+                if error:
+                    errors.append({"project": project['name'], "error": error})
+                for env_name in totals:
+                    totals[env_name] += row[env_name] or 0
+                yield sse_event('project', {"project": project['name'], "counts": row, "totals": totals,
+                                            "completed": len(result), "total": len(projects)})
+            yield sse_event('done', {"result": result, "totals": totals, "partial": bool(errors), "errors": errors})
+        except GeneratorExit:
+            app.logger.info(f"[SSE] deployments-by-environment stream closed by client after {len(result)} projects.")
+            raise
+        except Exception as e:
+            app.logger.error(f"Error in deployments_by_environment stream: {e}", exc_info=True)
+            yield sse_event('error', {"error": str(e), "completed": len(result)})
+
+    return sse_response(generate())
+
 @app.route('/api/projects/<project_name>/deployments-by-environment', methods=['GET'])
+@with_budget(30)
 def project_deployments_by_environment(project_name):
-    from collections import defaultdict
     import json
     from datetime import datetime
     from dateutil import parser as dtparser
     cache_key = f"deployments-env-{project_name}"
-    now = time.time()
     # 1. In-memory cache kontrolü
-    if cache_key in metrics_cache and now - metrics_cache[cache_key]['time'] < metrics_cache_expiry:
+    cached = get_memory_cache(cache_key, metrics_cache_expiry)
+    if cached is not None:
         app.logger.info(f'[CACHE] Returning in-memory cached deployments-env for {cache_key}')
-        return jsonify(metrics_cache[cache_key]['data'])
+        return jsonify(cached['data'])
     # 2. SQLite cache kontrolü
     cache_data, cache_time = get_cache(cache_key)
     if cache_data:
         cache_dt = dtparser.parse(cache_time)
         if (datetime.utcnow() - cache_dt).total_seconds() < metrics_cache_expiry:
             app.logger.info(f'[CACHE] Returning SQLite cached deployments-env for {cache_key}')
-            metrics_cache[cache_key] = {'data': json.loads(cache_data), 'time': now}
+            set_memory_cache(cache_key, json.loads(cache_data))
             return jsonify(json.loads(cache_data))
     try:
-        org_url_full = get_devops_org_url()
-        organization_name = org_url_full.split('/')[-1]
+        organization_name = get_devops_org_name()
         now_utc = datetime.utcnow()
         start_utc = now_utc - timedelta(days=30)
         start_date_iso = start_utc.isoformat() + "Z"
         end_date_iso = now_utc.isoformat() + "Z"
         deployments = get_all_deployments_for_project(organization_name, project_name, start_date_iso, end_date_iso)
-        env_counts = defaultdict(int)
-        for dep in deployments:
-            env_name = None
-            if dep.get('releaseEnvironment', {}).get('name'):
-                env_name = dep['releaseEnvironment']['name']
-            elif dep.get('release', {}).get('environmentName'):
-                env_name = dep['release']['environmentName']
-            if env_name:
-                env_lower = env_name.lower()
-                if 'test' in env_lower:
-                    env_counts['Test'] += 1
-                elif 'stag' in env_lower:
-                    env_counts['Staging'] += 1
-                elif 'prod' in env_lower:
-                    env_counts['Production'] += 1
-                else:
-                    env_counts[env_name] += 1
-            else:
-                env_counts['Unknown'] += 1
+        events = EventTable.from_events(deployments=deployments)
+        env_counts = bucket_environment_counts(events.value_counts(EVENT_DEPLOYMENT, 'environment'))
         result = {
             'project': project_name,
             'Test': env_counts.get('Test', 0),
             'Staging': env_counts.get('Staging', 0),
             'Production': env_counts.get('Production', 0),
-            'deployment_frequency': round(len(deployments) / 30, 2) if deployments else 0.0
+            'deployment_frequency': round(len(events) / 30, 2) if len(events) else 0.0
         }
         # 3. Cache güncelle
-        metrics_cache[cache_key] = {'data': result, 'time': now}
+        set_memory_cache(cache_key, result)
         set_cache(cache_key, json.dumps(result))
         return jsonify(result)
     except Exception as e:
         app.logger.error(f"Error in project_deployments_by_environment: {e}", exc_info=True)
+        stale = stale_response(cache_key, e)
+        if stale is not None:
+            return stale
         return jsonify({"error": str(e)}), 500
 
+# Service hooks
+# Azure DevOps pushes build, push, deployment and repository events here. Each event only
+# invalidates the cache keys of its project and adds itself to the daily rollups, which is
+# what lets HOOK_TTL_FACTOR stretch the TTLs of those caches.
+def is_authorized_secret(req, secret, header):
+    """True if the request carries secret in `header` or as the basic auth password."""
+    import hmac
+    supplied = req.headers.get(header)
+    if not supplied and req.authorization:
+        supplied = req.authorization.password
+    if not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode(), secret.encode())
+
+def is_authorized_hook(req):
+    return is_authorized_secret(req, AZURE_DEVOPS_HOOK_SECRET, 'X-Hook-Secret')
+
+def get_hook_project_name(payload):
+    resource = payload.get('resource') or {}
+    candidates = (
+        resource.get('project'),
+        (resource.get('repository') or {}).get('project'),
+        (resource.get('definition') or {}).get('project'),
+        (resource.get('deployment') or {}).get('projectReference'),
+    )
+    for candidate in candidates:
+        if candidate and candidate.get('name'):
+            return candidate['name']
+    if resource.get('projectName'):  # git.repo.deleted only carries projectId / projectName
+        return resource['projectName']
+    # Fall back to the project id of the resource container and the cached inventory
+    project_id = ((payload.get('resourceContainers') or {}).get('project') or {}).get('id')
+    if project_id:
+        import json
+        cache_data, _ = get_cache(DEVOPS_INFO_CACHE_KEY)
+        for project in json.loads(cache_data) if cache_data else []:
+            if project.get('project_id') == project_id:
+                return project.get('project_name')
+    return None
+
+HookDelivery = namedtuple('HookDelivery', ['event_id', 'event_type', 'project'])
+
+def claim_hook_delivery(c, delivery):
+    """
+    Records a delivery inside the caller's transaction. False if its event id was already
+    claimed, i.e. the hook is a redelivery; deliveries without an id are always processed.
+    """
+    if delivery is None or not delivery.event_id:
+        return True
+    c.execute('INSERT OR IGNORE INTO hook_deliveries (event_id, event_type, project) VALUES (?, ?, ?)', delivery)
+    return c.rowcount == 1
+
+def claim_hook_delivery_only(delivery):
+    with db_lock, connect_db() as conn:
+        claimed = claim_hook_delivery(conn.cursor(), delivery)
+        conn.commit()
+        return claimed
+
+# Handlers claim the delivery before changing anything and return None for redeliveries
+def handle_build_complete_hook(project_name, resource, delivery):
+    events = EventTable.from_events(builds=[to_build_record(resource)])
+    rollup_days = apply_rollup_events(project_name, events, delivery)
+    if rollup_days is None:
+        return None
+    return {
+        "rollup_days": rollup_days,
+        "invalidated": delete_cache_prefix(f"metrics-{project_name}:") + delete_cache_prefix(f"build-stats-{project_name}:"),
+    }
+
+def handle_git_push_hook(project_name, resource, delivery):
+    # Rollups count default-branch history (what the commits API returns), so pushes to
+    # other branches only invalidate caches
+    repository = resource.get('repository') or {}
+    default_branch = repository.get('defaultBranch')
+    pushed_refs = [ref.get('name') for ref in resource.get('refUpdates') or []]
+    commits = []
+    if default_branch and default_branch in pushed_refs:
+        commits = [to_commit_record(c) for c in resource.get('commits') or []]
+    rollup_days = apply_rollup_events(project_name, EventTable.from_events(commits=commits), delivery)
+    if rollup_days is None:
+        return None
+    return {
+        "rollup_days": rollup_days,
+        "invalidated": delete_cache_prefix(f"metrics-{project_name}:") + delete_cache_prefix(f"recent-commits-{project_name}:"),
+    }
+
+def handle_deployment_completed_hook(project_name, resource, delivery):
+    record = to_deployment_record(resource.get('deployment') or {})
+    if not record.environment:
+        record = record._replace(environment=(resource.get('environment') or {}).get('name'))
+    events = EventTable.from_events(deployments=[record])
+    rollup_days = apply_rollup_events(project_name, events, delivery)
+    if rollup_days is None:
+        return None
+    return {
+        "rollup_days": rollup_days,
+        "invalidated": delete_cache_prefix(f"metrics-{project_name}:") + delete_cache(f"deployments-env-{project_name}"),
+    }
+
+def handle_repo_changed_hook(project_name, resource, delivery):
+    if not claim_hook_delivery_only(delivery):
+        return None
+    return {
+        "rollup_days": 0,
+        "invalidated": (delete_cache(f"repos-{project_name}") + expire_cache_prefix(DEVOPS_INFO_CACHE_KEY, exact=True)
+                        + delete_cache_prefix(f"metrics-{project_name}:")
+                        + delete_cache_prefix(f"recent-commits-{project_name}:")),
+    }
+
+HOOK_HANDLERS = {
+    'build.complete': handle_build_complete_hook,
+    'git.push': handle_git_push_hook,
+    'ms.vss-release.deployment-completed-event': handle_deployment_completed_hook,
+    'git.repo.created': handle_repo_changed_hook,
+    'git.repo.deleted': handle_repo_changed_hook,
+    'git.repo.renamed': handle_repo_changed_hook,
+}
+
+@app.route('/api/hooks/azure-devops', methods=['POST'])
+def azure_devops_hook():
+    """
+    Receives Azure DevOps service-hook events. Recorded payloads can be replayed locally:
+    curl -u hook:$AZURE_DEVOPS_HOOK_SECRET -H 'Content-Type: application/json' \\
+         --data @payload.json http://localhost:5000/api/hooks/azure-devops
+    """
+    if not AZURE_DEVOPS_HOOK_SECRET:
+        app.logger.error("Service hook received but AZURE_DEVOPS_HOOK_SECRET is not set.")
+        return jsonify({"error": "Service hooks are not configured on the server."}), 503
+    if not is_authorized_hook(request):
+        app.logger.warning("[HOOK] Rejected service hook with missing or invalid secret.")
+        return jsonify({"error": "Unauthorized"}), 401
+    payload = request.get_json(silent=True)
+    if not payload or not payload.get('eventType'):
+        return jsonify({"error": "Expected an Azure DevOps service hook payload with an eventType."}), 400
+
+    event_type = payload['eventType']
+    event_id = payload.get('id')
+    handler = HOOK_HANDLERS.get(event_type)
+    if handler is None:
+        app.logger.info(f"[HOOK] Ignoring unsupported event type {event_type}")
+        return jsonify({"status": "ignored", "event_type": event_type}), 200
+    project_name = get_hook_project_name(payload)
+    if not project_name:
+        app.logger.warning(f"[HOOK] Could not resolve project for {event_type} event {event_id}")
+        return jsonify({"status": "ignored", "event_type": event_type, "reason": "unknown project"}), 200
+    try:
+        outcome = handler(project_name, payload.get('resource') or {}, HookDelivery(event_id, event_type, project_name))
+        if outcome is None:
+            app.logger.info(f"[HOOK] Duplicate delivery {event_id} ({event_type}) skipped")
+            return jsonify({"status": "duplicate", "event_type": event_type, "project": project_name}), 200
+        app.logger.info(f"[HOOK] {event_type} for {project_name}: {outcome}")
+        return jsonify({"status": "processed", "event_type": event_type, "project": project_name, **outcome}), 200
+    except Exception as e:
+        app.logger.error(f"Error processing {event_type} hook for {project_name}: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+# Cache administration
+# Inspect, purge, compact and re-warm caches without deleting devops_cache.db. Warm-ups
+# expire the targeted entries (the previous value stays available as stale fallback) and
+# then request the routes that own them, so each route refills its cache its own way.
+ADMIN_WARMUP_JOBS_KEPT = 20
+
+warmup_jobs = {}  # job id -> status, most recent ADMIN_WARMUP_JOBS_KEPT
+warmup_jobs_lock = Lock()
+
+def admin_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not CACHE_ADMIN_SECRET:
+            return jsonify({"error": "Cache administration is not configured on the server."}), 503
+        if not is_authorized_secret(request, CACHE_ADMIN_SECRET, 'X-Admin-Secret'):
+            app.logger.warning(f"[ADMIN] Rejected {request.method} {request.path} with missing or invalid secret.")
+            return jsonify({"error": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def cache_key_route(cache_key):
+    """API path (relative to /api) whose handler fills cache_key, or None for unknown keys."""
+    import re
+    from urllib.parse import quote
+    fixed = {
+        DEVOPS_INFO_CACHE_KEY: '/devops-info',
+        ACTIVITY_SUMMARY_CACHE_KEY: '/activity_summary',
+        DEPLOYMENTS_BY_ENVIRONMENT_CACHE_KEY: '/deployments-by-environment',
+    }
+    if cache_key in fixed:
+        return fixed[cache_key]
+    patterns = (
+        (r'^(metrics|build-stats)-(.+):(\d{4}-\d\d-\d\d)\.\.(\d{4}-\d\d-\d\d)$',
+         lambda m: f"/projects/{quote(m[2])}/{m[1]}?{urlencode({'start': m[3], 'end': m[4]})}"),
+        (r'^(metrics|build-stats)-(.+):(.+)$', lambda m: f"/projects/{quote(m[2])}/{m[1]}?{urlencode({'period': m[3]})}"),
+        (r'^recent-commits-(.+):(\d+)$', lambda m: f"/projects/{quote(m[1])}/recent-commits?limit={m[2]}"),
+        (r'^team-members-(.+)-([0-9a-fA-F-]{36})$', lambda m: f"/projects/{quote(m[1])}/teams/{m[2]}/members"),
+        (r'^deployments-env-(.+)$', lambda m: f"/projects/{quote(m[1])}/deployments-by-environment"),
+        (r'^(repos|pipelines|releases|teams)-(.+)$', lambda m: f"/projects/{quote(m[2])}/{m[1]}"),
+    )
+    for pattern, build in patterns:
+        match = re.match(pattern, cache_key)
+        if match:
+            return build(match)
+    return None
+
+def project_cache_prefixes(project_name):
+    """Cache key prefixes owned by one project (exact keys end with their full name)."""
+    return (f"metrics-{project_name}:", f"build-stats-{project_name}:", f"recent-commits-{project_name}:",
+            f"team-members-{project_name}-", f"repos-{project_name}", f"pipelines-{project_name}",
+            f"releases-{project_name}", f"teams-{project_name}", f"deployments-env-{project_name}")
+
+def list_cache_keys(prefix=''):
+    """(unscoped key, updated_at, size, expired) of SQLite entries of the current organization."""
+    scoped_prefix = org_scoped(prefix)
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        c.execute('SELECT cache_key, updated_at, length(data), expired FROM projects_cache WHERE substr(cache_key, 1, ?) = ? ORDER BY cache_key',
+                  (len(scoped_prefix), scoped_prefix))
+        rows = c.fetchall()
+    # An empty prefix of the default organization also matches namespaced keys of other orgs
+    return [(key, row[1], row[2], bool(row[3])) for row in rows for key in org_unscoped([row[0]])]
+
+def plan_warmup(keys, projects):
+    """Expires the targets and returns the API paths (relative to /api) that refill them."""
+    paths = [cache_key_route(key) for key in keys]
+    unknown = [key for key, path in zip(keys, paths) if path is None]
+    if unknown:
+        raise ValueError(f"Don't know which route fills cache keys: {', '.join(unknown)}")
+    for key in keys:
+        expire_cache_prefix(key, exact=True)
+    for project_name in projects:
+        from urllib.parse import quote
+        cached_keys = []
+        for prefix in project_cache_prefixes(project_name):
+            # Exact keys (repos-<p>, ...) must not pick up projects whose name starts with <p>
+            exact = not prefix.endswith((':', '-'))
+            cached_keys.extend(key for key, _, _, _ in list_cache_keys(prefix) if not exact or key == prefix)
+            expire_cache_prefix(prefix, exact=exact)
+        coverage = get_rollup_coverage(project_name)
+        if coverage is not None:
+            # Next rollup read re-fetches the open tail of the project
+            set_rollup_coverage(project_name, coverage[0], coverage[1], 0)
+        project_path = f"/projects/{quote(project_name)}"
+        paths.extend([f"{project_path}/metrics", f"{project_path}/repos", f"{project_path}/pipelines",
+                      f"{project_path}/releases", f"{project_path}/teams", f"{project_path}/deployments-by-environment"])
+        paths.extend(cache_key_route(key) for key in cached_keys)
+    # Keep the first occurrence of every path
+    return list(dict.fromkeys(path for path in paths if path))
+
+def run_warmup(paths, org_name, job=None):
+    """Requests each path through the app itself; returns [{"path", "status", "ms"}]."""
+    client = app.test_client()
+    base = f"/api/orgs/{org_name}" if org_name else "/api"
+    results = job["results"] if job is not None else []
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            status = client.get(base + path).status_code
+        except Exception as e:
+            app.logger.error(f"[ADMIN] Warm-up of {path} failed: {e}", exc_info=True)
+            status = 500
+        results.append({"path": path, "status": status, "ms": round((time.perf_counter() - started) * 1000, 1)})
+    app.logger.info(f"[ADMIN] Warmed {len(paths)} routes for org {org_name or get_default_org_name()}")
+    return results
+
+def run_warmup_job(job_id, paths, org_name):
+    job = warmup_jobs[job_id]
+    try:
+        run_warmup(paths, org_name, job)
+        job["status"] = "done"
+    except Exception as e:
+        job.update({"status": "failed", "error": str(e)})
+    finally:
+        job["finished_at"] = time.time()
+
+@app.route('/api/admin/cache', methods=['GET'])
+@admin_required
+def admin_list_cache():
+    """Cache keys of the organization with size, age and hits since start. ?prefix= filters."""
+    prefix = request.args.get('prefix', '')
+    from dateutil import parser as dtparser
+    now_utc = datetime.utcnow()
+    entries = []
+    for key, updated_at, size, expired in list_cache_keys(prefix):
+        scoped_key = org_scoped(key)
+        memory_entry = metrics_cache.get(scoped_key)
+        entries.append({
+            "key": key,
+            "size_bytes": size,
+            "age_sec": int((now_utc - dtparser.parse(updated_at)).total_seconds()),
+            "expired": expired,
+            "in_memory": memory_entry is not None,
+            "hits": {"memory": cache_hits['memory'][scoped_key], "sqlite": cache_hits['sqlite'][scoped_key]},
+        })
+    return jsonify({"count": len(entries), "total_bytes": sum(e["size_bytes"] or 0 for e in entries), "entries": entries})
+
+@app.route('/api/admin/cache', methods=['DELETE'])
+@admin_required
+def admin_purge_cache():
+    """Deletes every cache entry whose key starts with ?prefix= (e.g. metrics-<project>:)."""
+    prefix = request.args.get('prefix')
+    if not prefix:
+        return jsonify({"error": "prefix is required"}), 400
+    deleted = delete_cache_prefix(prefix)
+    app.logger.info(f"[ADMIN] Purged {deleted} cache entries with prefix {prefix!r}")
+    return jsonify({"prefix": prefix, "deleted": deleted})
+
+@app.route('/api/admin/cache/vacuum', methods=['POST'])
+@admin_required
+def admin_vacuum_cache():
+    """
+    Compacts devops_cache.db. Optional JSON {"hook_deliveries_older_than_days": N} also prunes
+    old service-hook dedupe records first.
+    """
+    body = request.get_json(silent=True) or {}
+    size_before = os.path.getsize(DB_PATH) if os.path.exists(DB_PATH) else 0
+    pruned = 0
+    with db_lock, connect_db() as conn:
+        c = conn.cursor()
+        days = body.get('hook_deliveries_older_than_days')
+        if days is not None:
+            c.execute("DELETE FROM hook_deliveries WHERE received_at < datetime('now', ?)", (f'-{int(days)} days',))
+            pruned = c.rowcount
+            conn.commit()
+        c.execute('VACUUM')
+        c.execute('PRAGMA optimize')
+    size_after = os.path.getsize(DB_PATH)
+    app.logger.info(f"[ADMIN] Vacuumed {DB_PATH}: {size_before} -> {size_after} bytes")
+    return jsonify({"size_before_bytes": size_before, "size_after_bytes": size_after, "hook_deliveries_pruned": pruned})
+
+@app.route('/api/admin/warmup', methods=['POST'])
+@admin_required
+def admin_warmup():
+    """
+    Refreshes chosen cache keys and/or projects: JSON {"keys": [...], "projects": [...],
+    "async": false}. Synchronous runs return per-route results; async ones return 202 and a
+    job to poll at /api/admin/warmup/<job_id>.
+    """
+    import uuid
+    body = request.get_json(silent=True) or {}
+    keys = body.get('keys') or []
+    projects = body.get('projects') or []
+    if not keys and not projects:
+        return jsonify({"error": "keys or projects is required"}), 400
+    try:
+        paths = plan_warmup(keys, projects)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    org_name = current_org.get()
+    if not body.get('async'):
+        return jsonify({"paths": len(paths), "results": run_warmup(paths, org_name)})
+    job_id = uuid.uuid4().hex
+    with warmup_jobs_lock:
+        warmup_jobs[job_id] = {"id": job_id, "status": "running", "paths": paths, "results": [],
+                               "started_at": time.time(), "finished_at": None}
+        for old_id in list(warmup_jobs)[:-ADMIN_WARMUP_JOBS_KEPT]:
+            warmup_jobs.pop(old_id, None)
+    Thread(target=run_warmup_job, args=(job_id, paths, org_name), daemon=True).start()
+    return jsonify(warmup_jobs[job_id]), 202
+
+@app.route('/api/admin/warmup/<job_id>', methods=['GET'])
+@admin_required
+def admin_warmup_status(job_id):
+    job = warmup_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown warm-up job"}), 404
+    return jsonify(job)
+
+# Org-scoped aliases: /api/orgs/<org>/... serves the same view as /api/... for that organization
+ORG_AGNOSTIC_ROUTES = ('/api/health', '/api/ready', '/api/orgs')
+
+def register_org_routes():
+    for rule in list(app.url_map.iter_rules()):
+        if not rule.rule.startswith('/api/') or rule.rule in ORG_AGNOSTIC_ROUTES:
+            continue
+        app.add_url_rule('/api/orgs/<org>' + rule.rule[len('/api'):], endpoint=rule.endpoint,
+                         view_func=app.view_functions[rule.endpoint], methods=rule.methods - {'HEAD', 'OPTIONS'})
+
+register_org_routes()
+
 if __name__ == '__main__':
+    start_background_services(handle_sigterm=True)
     # debug=True geliştirme sırasında daha fazla log ve otomatik yeniden yükleme sağlar.
     # Üretimde Gunicorn gibi bir WSGI sunucusu kullanılmalıdır.
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=True)
+
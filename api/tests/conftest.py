@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('AZURE_DEVOPS_ORG_URL', 'https://dev.azure.com/test-org')
+os.environ.setdefault('AZURE_DEVOPS_PAT', 'test-pat')
+os.environ['AZURE_DEVOPS_HOOK_SECRET'] = 'test-secret'
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as api  # noqa: E402
+
+HOOK_HEADERS = {'X-Hook-Secret': 'test-secret'}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api, 'AZURE_DEVOPS_HOOK_SECRET', 'test-secret')
+    monkeypatch.setattr(api, 'db_initialized', False)
+    monkeypatch.setattr(api, 'background_started', True)
+    api.metrics_cache.clear()
+    api.rollup_prefix_cache.clear()
+    api.dora_prefix_cache.clear()
+    return api.app.test_client()
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import app as api
+from conftest import HOOK_HEADERS
+
+
+def iso(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def commit(commit_id, authored):
+    return {'commitId': commit_id, 'author': {'name': 'Ann', 'email': 'ann@example.com', 'date': iso(authored)}}
+
+
+def production_deployment(completed, status='succeeded', deployment_id=None):
+    return {'id': deployment_id, 'deploymentStatus': status, 'releaseEnvironment': {'name': 'Production'},
+            'startedOn': iso(completed - timedelta(minutes=5)), 'completedOn': iso(completed)}
+
+
+def sync_initial_history(now):
+    """What sync_project_rollups stores on a project's first sync: 3 commits after the last deployment."""
+    first_day = api.epoch_day(now) - 2
+    events = api.EventTable.from_events(
+        deployments=[api.to_deployment_record(production_deployment(now - timedelta(days=1)))],
+        commits=[api.to_commit_record(commit(f'c{i}', now - timedelta(hours=i + 1))) for i in range(3)],
+    )
+    api.apply_dora_events('Proj', events, first_day)
+    api.set_rollup_coverage('Proj', first_day, api.epoch_day(now), 0)
+
+
+def production_deployments(day):
+    return api.query_dora_metrics('Proj', day, day)['production_deployments']
+
+
+def pending_commits():
+    with api.connect_db() as conn:
+        return conn.execute('SELECT pending_commits FROM dora_state WHERE project=?', ('Proj',)).fetchone()[0]
+
+
+def post_hook(client, event_id, event_type, resource):
+    resource = {'project': {'name': 'Proj'}, **resource}
+    response = client.post('/api/hooks/azure-devops', headers=HOOK_HEADERS,
+                           json={'id': event_id, 'eventType': event_type, 'resource': resource})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_commit_authored_before_last_build_is_settled_by_next_deployment(client):
+    now = datetime.utcnow()
+    sync_initial_history(now)
+    assert pending_commits() == 3
+
+    post_hook(client, 'build-1', 'build.complete', {
+        'status': 'completed', 'result': 'succeeded',
+        'startTime': iso(now - timedelta(minutes=10)), 'finishTime': iso(now),
+    })
+    post_hook(client, 'push-1', 'git.push', {
+        'repository': {'defaultBranch': 'refs/heads/main'},
+        'refUpdates': [{'name': 'refs/heads/main'}],
+        'commits': [commit('late', now - timedelta(minutes=30))],
+    })
+    assert pending_commits() == 4
+
+    deployed = now + timedelta(minutes=5)
+    post_hook(client, 'deploy-1', 'ms.vss-release.deployment-completed-event',
+              {'deployment': production_deployment(deployed)})
+    assert pending_commits() == 0
+    metrics = api.query_dora_metrics('Proj', api.epoch_day(deployed), api.epoch_day(deployed))
+    expected_hours = (sum(i + 1 for i in range(3)) + 0.5 + 4 * 5 / 60) / 4
+    assert metrics['lead_time_hours'] == round(expected_hours, 2)
+
+
+def test_replayed_commits_are_not_counted_twice(client):
+    now = datetime.utcnow()
+    sync_initial_history(now)
+    replay = api.EventTable.from_events(
+        commits=[api.to_commit_record(commit(f'c{i}', now - timedelta(hours=i + 1))) for i in range(3)])
+    api.apply_dora_events('Proj', replay, api.epoch_day(now))
+    assert pending_commits() == 3
+
+
+def test_out_of_order_deployments_are_counted_once(client):
+    now = datetime.utcnow()
+    sync_initial_history(now)
+    today = api.epoch_day(now)
+    later = production_deployment(now + timedelta(minutes=20), deployment_id=2)
+    earlier = production_deployment(now + timedelta(minutes=10), status='failed', deployment_id=1)
+    post_hook(client, 'deploy-2', 'ms.vss-release.deployment-completed-event', {'deployment': later})
+    post_hook(client, 'deploy-1', 'ms.vss-release.deployment-completed-event', {'deployment': earlier})
+    assert production_deployments(today) == 2
+    assert api.query_dora_metrics('Proj', today, today)['change_failure_rate'] == 50.0
+
+    # A re-sync fetching the same deployments again changes nothing
+    resync = api.EventTable.from_events(deployments=[api.to_deployment_record(d) for d in (earlier, later)])
+    api.apply_dora_events('Proj', resync, today)
+    assert production_deployments(today) == 2
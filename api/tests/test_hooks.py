@@ -0,0 +1,107 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import app as api
+from conftest import HOOK_HEADERS
+
+PAYLOADS_DIR = os.path.join(os.path.dirname(__file__), 'payloads')
+PROJECT = 'Fabrikam-Fiber-Git'
+PROJECT_ID = 'be9b3917-87e6-42a4-a549-2bc06a7a878f'
+REPO_EVENTS = ('git.repo.created', 'git.repo.renamed', 'git.repo.deleted')
+
+# Keys seeded before each delivery; the other project's entry must never be touched
+SEEDED_KEYS = (
+    f'metrics-{PROJECT}:30d', f'build-stats-{PROJECT}:30d', f'recent-commits-{PROJECT}:10', f'repos-{PROJECT}',
+    f'pipelines-{PROJECT}', f'deployments-env-{PROJECT}', 'metrics-Other:30d',
+)
+
+
+def load_payload(event_type):
+    with open(os.path.join(PAYLOADS_DIR, f'{event_type}.json')) as f:
+        return json.load(f)
+
+
+def post(client, payload, **kwargs):
+    kwargs.setdefault('headers', HOOK_HEADERS)
+    return client.post('/api/hooks/azure-devops', json=payload, **kwargs)
+
+
+def cache_inventory():
+    api.set_cache(api.DEVOPS_INFO_CACHE_KEY, json.dumps([{'project_id': PROJECT_ID, 'project_name': PROJECT}]))
+
+
+def cached_keys():
+    """{key: expired} of every SQLite cache entry."""
+    return {key: expired for key, _, _, expired in api.list_cache_keys()}
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Hook-Secret': 'wrong'}])
+def test_rejects_missing_or_wrong_secret(client, headers):
+    response = post(client, load_payload('git.push'), headers=headers)
+    assert response.status_code == 401
+    assert post(client, load_payload('git.push')).get_json()['status'] == 'processed'
+
+
+def test_accepts_secret_as_basic_auth_password(client):
+    response = post(client, load_payload('git.push'), headers={}, auth=('hook', 'test-secret'))
+    assert response.get_json()['status'] == 'processed'
+
+
+def test_redelivery_is_reported_as_duplicate(client):
+    payload = load_payload('ms.vss-release.deployment-completed-event')
+    assert post(client, payload).get_json()['status'] == 'processed'
+    second = post(client, payload).get_json()
+    assert (second['status'], second['project']) == ('duplicate', PROJECT)
+
+
+def test_project_from_resource_containers_needs_cached_inventory(client):
+    payload = load_payload('build.complete')
+    first = post(client, payload).get_json()
+    assert (first['status'], first['reason']) == ('ignored', 'unknown project')
+
+    cache_inventory()
+    second = post(client, payload).get_json()
+    assert (second['status'], second['project']) == ('processed', PROJECT)
+
+
+def test_repo_deleted_names_its_project_without_inventory(client):
+    body = post(client, load_payload('git.repo.deleted')).get_json()
+    assert (body['status'], body['project']) == ('processed', PROJECT)
+
+
+@pytest.mark.parametrize('event_type, invalidated', [
+    ('build.complete', {f'metrics-{PROJECT}:30d', f'build-stats-{PROJECT}:30d'}),
+    ('git.push', {f'metrics-{PROJECT}:30d', f'recent-commits-{PROJECT}:10'}),
+    ('ms.vss-release.deployment-completed-event', {f'metrics-{PROJECT}:30d', f'deployments-env-{PROJECT}'}),
+    *((event_type, {f'metrics-{PROJECT}:30d', f'recent-commits-{PROJECT}:10', f'repos-{PROJECT}',
+                    api.DEVOPS_INFO_CACHE_KEY}) for event_type in REPO_EVENTS),
+])
+def test_invalidated_cache_keys(client, event_type, invalidated):
+    cache_inventory()
+    for key in SEEDED_KEYS:
+        api.set_cache(key, '{}')
+    body = post(client, load_payload(event_type)).get_json()
+    assert (body['status'], body['project'], body['invalidated']) == ('processed', PROJECT, len(invalidated))
+
+    remaining = cached_keys()
+    for key in SEEDED_KEYS:
+        assert (key in remaining) == (key not in invalidated), key
+    # The inventory is only expired, so searches and /api/devops-info can still fall back to it
+    assert remaining[api.DEVOPS_INFO_CACHE_KEY] == (api.DEVOPS_INFO_CACHE_KEY in invalidated)
+
+
+def test_push_counts_default_branch_commits_in_covered_days(client):
+    payload = load_payload('git.push')
+    day = api.epoch_day(datetime(2015, 2, 25))
+    api.set_rollup_coverage(PROJECT, day, day, 0)
+
+    other_branch = json.loads(json.dumps(payload))
+    other_branch['id'] = 'feature-push'
+    other_branch['resource']['refUpdates'][0]['name'] = 'refs/heads/feature'
+    assert post(client, other_branch).get_json()['rollup_days'] == 0
+    assert post(client, payload).get_json()['rollup_days'] == 1
+    with api.connect_db() as conn:
+        assert conn.execute('SELECT commits FROM daily_rollups WHERE project=? AND day=?', (PROJECT, day)).fetchone() == (1,)